@@ -1,19 +1,18 @@
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+import logging
 from typing import Dict
 from uuid import UUID as PyUUID
 from auth.dependencies import get_current_user_id
 from services.user_service import UserService
 from models.schemas import PinUpdatePayload, ResetPasswordUpdate, UserBase, UserCreate, UserLogin, UserOut
 from auth.jwt_handler import JWTHandler
-from service_dependencies import get_user_service
+from service_dependencies import get_readonly_user_service, get_user_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-INVALID_CREDENTIALS = HTTPException(
-    status_code=status.HTTP_401_UNAUTHORIZED,
-    detail="Invalid credentials",
-    headers={"WWW-Authenticate": "Bearer"},
-)
+INVALID_CREDENTIALS = "Invalid credentials"
 
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 async def user_register(
@@ -33,7 +32,11 @@ async def user_login(
     user_out = await user_service.authenticate_user(user_data)
     
     if not user_out:
-        raise INVALID_CREDENTIALS
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=INVALID_CREDENTIALS,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     # Pass the ID string to JWT handler
     token_dict = JWTHandler.sign_jwt(user_out.id)
@@ -42,9 +45,9 @@ async def user_login(
 @router.get("/pin")
 async def get_pin(
     user_id: PyUUID = Depends(get_current_user_id),
-    user_service: UserService = Depends(get_user_service)
+    user_service: UserService = Depends(get_readonly_user_service)
 ):
-    print(user_id)
+    logger.debug("PIN requested for user %s", user_id)
     pin = await user_service.get_user_pin(user_id)
     return {"pin": pin}
 
@@ -55,7 +58,7 @@ async def update_pin(
     user_service: UserService = Depends(get_user_service)
 ):
     new_pin = payload.pin
-    print(user_id)
+    logger.debug("PIN update requested for user %s", user_id)
     if not new_pin:
         raise HTTPException(status_code=400, detail="PIN is required")
         
@@ -119,7 +122,7 @@ async def reset_password(
 
 @router.get("/reset-password/validate")
 async def validate_reset_token(token: str,
-    user_service: UserService = Depends(get_user_service)):
+    user_service: UserService = Depends(get_readonly_user_service)):
     """
     Checks if a password reset token is valid and not expired.
     Called by the Flutter app when the ResetPasswordScreen loads.
@@ -1,51 +1,62 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Form, File, UploadFile
+from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Path, Form, File, UploadFile
+from fastapi.responses import ORJSONResponse
 import logging
 from uuid import UUID as PyUUID
 
 from models.schemas import Category
-from service_dependencies import get_category_service
+from service_dependencies import get_category_service, get_readonly_category_service
 from auth.dependencies import get_current_user_id
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="",
-    tags=["Categories"]
+    tags=["Categories"],
+    default_response_class=ORJSONResponse,
 )
 
+CATEGORY_NOT_FOUND = "Category not found or access denied."
+EMPTY_IMAGE = "Image file is required and cannot be empty."
+EMPTY_IMAGE_UPDATE = "Provided image file is empty."
+CREATE_FAILED = "An unexpected error occurred while creating the category."
+UPDATE_FAILED = "An unexpected error occurred while updating the category."
+DELETE_FAILED = "An unexpected error occurred during deletion."
+
 @router.get(
     "/profile/{profile_id}",
-    response_model=List[Category],
+    responses={status.HTTP_200_OK: {"model": List[Category]}},
     status_code=status.HTTP_200_OK,
     summary="Retrieve all categories for a specific profile"
 )
 async def get_categories_by_profile_id(
     profile_id: int = Path(..., description="The ID of the profile"),
     user_id: PyUUID = Depends(get_current_user_id),
-    category_service = Depends(get_category_service)
+    category_service = Depends(get_readonly_category_service)
 ):
-    return await category_service.find_by_profile_id(user_id, profile_id)
+    # Service output is already validated; dump it once instead of re-validating via response_model
+    categories = await category_service.find_by_profile_id(user_id, profile_id)
+    return ORJSONResponse([c.model_dump(mode="json", by_alias=True) for c in categories])
 
 @router.get(
     "/{id}",
-    response_model=Category,
+    responses={status.HTTP_200_OK: {"model": Category}},
     status_code=status.HTTP_200_OK,
     summary="Retrieve a specific category by ID"
 )
 async def get_category_by_id(
     id: int = Path(..., description="The ID of the category"),
     user_id: PyUUID = Depends(get_current_user_id),
-    category_service = Depends(get_category_service)
+    category_service = Depends(get_readonly_category_service)
 ):
     category = await category_service.get_category_by_id(user_id, id)
     if not category:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found or access denied.")
-    return category
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=CATEGORY_NOT_FOUND)
+    return ORJSONResponse(category.model_dump(mode="json", by_alias=True))
 
 @router.post(
     "/profile/{profile_id}",
-    response_model=Category,
+    responses={status.HTTP_201_CREATED: {"model": Category}},
     status_code=status.HTTP_201_CREATED,
     summary="Create a new category for a profile with an image upload"
 )
@@ -56,36 +67,34 @@ async def create_category(
     user_id: PyUUID = Depends(get_current_user_id),
     category_service = Depends(get_category_service)
 ):
-    image_bytes = await image_file.read()
-    if not image_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            detail="Image file is required and cannot be empty."
-        )
+    # Starlette tracks the spooled upload size, so emptiness can be checked without buffering the body
+    if not image_file.size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EMPTY_IMAGE)
 
     # 3. Call the service to save the category and image
     try:
-        return await category_service.create_category(
+        category = await category_service.create_category(
             user_id=user_id, 
             profile_id=profile_id, 
             name=name, 
             image_file=image_file
         )
+        return ORJSONResponse(
+            category.model_dump(mode="json", by_alias=True),
+            status_code=status.HTTP_201_CREATED,
+        )
     except HTTPException:
         # Re-raise exceptions raised by the service (like 404 for not found/unauthorized)
         raise
     except Exception as e:
         logger.error(f"Error creating category: {e}")
         # Catch unexpected errors and return 500
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            detail="An unexpected error occurred while creating the category."
-        )
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=CREATE_FAILED)
 
 
 @router.put(
     "/{id}",
-    response_model=Category,
+    responses={status.HTTP_200_OK: {"model": Category}},
     status_code=status.HTTP_200_OK,
     summary="Update an existing category, optionally replacing its image"
 )
@@ -100,16 +109,10 @@ async def update_category(
     Updates the category name and optionally replaces the image if a file is provided.
     Handles multipart/form-data.
     """
-    image_bytes: Optional[bytes] = None
-
     if image_file and image_file.filename:
-        image_bytes = await image_file.read()
         # Ensure that if a file object was sent, it actually contains content
-        if not image_bytes:
-             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, 
-                detail="Provided image file is empty."
-            )
+        if not image_file.size:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EMPTY_IMAGE_UPDATE)
 
     try:
         updated_category = await category_service.update_category(
@@ -118,16 +121,14 @@ async def update_category(
             name=name, 
             image_file=image_file
         )
-        return updated_category
+        # The response has always carried the Category shape; items are not reloaded on update
+        return ORJSONResponse({**updated_category.model_dump(mode="json", by_alias=True), "items": []})
     except HTTPException:
         # Re-raise exceptions raised by the service (like 404 for not found/unauthorized)
         raise
     except Exception as e:
         logger.error(f"Error updating category {id}: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            detail="An unexpected error occurred while updating the category."
-        )
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=UPDATE_FAILED)
 
 
 @router.delete(
@@ -136,6 +137,7 @@ async def update_category(
     summary="Delete a category by ID"
 )
 async def delete_category(
+    background_tasks: BackgroundTasks,
     id: int = Path(..., description="The ID of the category to delete"),
     user_id: PyUUID = Depends(get_current_user_id),
     category_service = Depends(get_category_service)
@@ -145,7 +147,7 @@ async def delete_category(
     Returns 204 No Content on success.
     """
     try:
-        await category_service.delete_category(user_id, id)
+        await category_service.delete_category(user_id, id, background_tasks)
     except HTTPException:
         # Re-raise exceptions raised by the service (though deleteById often handles 404 internally)
         raise
@@ -153,7 +155,4 @@ async def delete_category(
         logger.error(f"Error deleting category {id}: {e}")
         # The Java code returns 404 on general exception, but a successful delete should return 204.
         # We rely on the service to handle authorization and missing entities gracefully.
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            detail="An unexpected error occurred during deletion."
-        )
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=DELETE_FAILED)
\ No newline at end of file
@@ -1,13 +1,40 @@
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from operator import attrgetter
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from models.estnltk_schemas import SentenceRequest, SentenceResponse
 from models.schemas import ImageWord
-from services.estnltk_service import teisenda_ma_tahan_lauseosa, get_suggestions
-from typing import List
+from services.estnltk_service import teisenda_ma_tahan_lauseosa, get_suggestions, init_morph_worker
+from typing import List, Optional
+from config import settings
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.post("/convert", response_model=SentenceResponse, summary="Convert 'Ma tahan' sentence structure")
-def convert_sentence(request: SentenceRequest):
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Global dependency: This process pool is created and shut down in main.py's lifespan
+_morph_pool: Optional[ProcessPoolExecutor] = None
+
+async def get_morph_pool() -> ProcessPoolExecutor:
+    """Dependency function to get the morphology process pool."""
+    if _morph_pool is None:
+        raise RuntimeError("Morphology process pool not initialized in application lifespan.")
+    return _morph_pool
+
+@router.post(
+    "/convert",
+    responses={status.HTTP_200_OK: {"model": SentenceResponse}},
+    summary="Convert 'Ma tahan' sentence structure"
+)
+async def convert_sentence(
+    request: SentenceRequest,
+    morph_pool: ProcessPoolExecutor = Depends(get_morph_pool)
+):
     """
     Converts a list of words (provided as ImageWordBase objects) into the correct
     grammatical forms for the Estonian 'Ma tahan' construction.
@@ -16,32 +43,28 @@ def convert_sentence(request: SentenceRequest):
     try:
         # 1. Extract the list of base words (strings) for the morphology service
         # This extracts the 'word' attribute from each ImageWordBase object in the input list.
-        base_words = [item.word for item in request.sentence]
-        
-        # 2. Call the service function to perform the core morphology logic
-        conjugated_words = teisenda_ma_tahan_lauseosa(base_words)
+        base_words = list(map(attrgetter("word"), request.sentence))
         
-        # 3. Combine original DTOs and conjugated results into the final response list
-        converted_sentence_data: List[ImageWord] = []
+        # 2. Run the CPU-bound morphology in a worker process so the event loop stays free
+        loop = asyncio.get_running_loop()
+        conjugated_words = await loop.run_in_executor(morph_pool, teisenda_ma_tahan_lauseosa, base_words)
         
-        # Iterate over the original input DTOs and the resulting conjugated words simultaneously
-        for original_dto, conjugated_word in zip(request.sentence, conjugated_words):            
-            # Create the final ImageWord response object
-            image_word_dto = ImageWord(
+        # 3. Combine original DTOs and conjugated results into the final response list.
+        # The request DTOs were validated on the way in and the conjugated words are
+        # trusted service output, so model_construct skips re-validating every word.
+        converted_sentence_data: List[ImageWord] = [
+            ImageWord.model_construct(
                 id=original_dto.id,
-                # Use data from the original request DTO
                 word=original_dto.word,
                 image_url=original_dto.image_url,
-                
-                # Add the computed conjugated word
                 conjugated_word=conjugated_word,
-                # id remains None as this is purely a conjugation endpoint
             )
-            converted_sentence_data.append(image_word_dto)
+            for original_dto, conjugated_word in zip(request.sentence, conjugated_words)
+        ]
         
-        return SentenceResponse(
-            sentence=converted_sentence_data
-        )
+        # Dump once straight to JSON-ready data instead of re-validating via response_model
+        response = SentenceResponse.model_construct(sentence=converted_sentence_data)
+        return ORJSONResponse(response.model_dump(mode="json", by_alias=True))
     except Exception as e:
         # Always log the full error, and return a generic 500 status to the client
         print(f"Error during sentence conversion: {e}")
@@ -52,12 +75,45 @@ def convert_sentence(request: SentenceRequest):
     
 @router.get("/partitive", response_model=List[str])
 async def get_word_suggestions(
-    word: str = Query(..., min_length=1, description="The word in nominative/root form")
+    word: str = Query(..., min_length=1, description="The word in nominative/root form"),
+    morph_pool: ProcessPoolExecutor = Depends(get_morph_pool)
 ):
     try:
-        suggestions = get_suggestions(word)
+        # Analysis and synthesis are CPU-bound; run them in the worker pool, not on the event loop
+        loop = asyncio.get_running_loop()
+        suggestions = await loop.run_in_executor(morph_pool, get_suggestions, word)
         return suggestions
     except Exception as e:
         # Log the error but return the original word so the UI doesn't break
         print(f"EstNLTK Error: {e}")
-        return [word]
\ No newline at end of file
+        return [word]
+
+async def warm_up_morph_pool() -> None:
+    """
+    Workers are spawned lazily on submit; one trivial job per worker starts them all now,
+    so init_morph_worker's EstNLTK load happens at startup instead of on the first request.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.gather(*(
+            loop.run_in_executor(_morph_pool, os.getpid) for _ in range(settings.morph_workers)
+        ))
+    except Exception:
+        # Not fatal: workers still load EstNLTK on their first request
+        logger.exception("Morphology pool warm-up failed")
+
+# --- Lifespan integration ---
+@asynccontextmanager
+async def estnltk_lifespan_manager(app):
+    global _morph_pool
+    logger.info("Starting morphology process pool.")
+    # Spawned (not forked) workers, since the parent already runs the event loop and logging threads
+    _morph_pool = ProcessPoolExecutor(
+        max_workers=settings.morph_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_morph_worker,
+    )
+    yield
+    logger.info("Stopping morphology process pool.")
+    _morph_pool.shutdown(wait=False, cancel_futures=True)
+    _morph_pool = None
\ No newline at end of file
@@ -1,18 +1,56 @@
+import asyncio
 import os
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from pathlib import Path
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.staticfiles import StaticFiles
 from config import settings
 
 from services.image_storage_service import ImageStorageService, get_storage_service
 
 UPLOAD_DIR = settings.upload_dir
+# Resolved once at import so the traversal guard doesn't re-resolve the CWD per request
+UPLOAD_ROOT = Path(UPLOAD_DIR).resolve()
+# Where main.py mounts UploadStaticFiles; local URLs handed to clients are built from it
+SERVE_PREFIX = "/api/v1/images/serve"
+# SigV4 presigned URLs are valid for at most 7 days
+MAX_URL_EXPIRY_S = 604800
 
 router = APIRouter(prefix="", tags=["images"])
 
+class UploadStaticFiles(StaticFiles):
+    """
+    Serves local uploads. Stored filenames are fresh UUIDs and never rewritten,
+    so clients may cache them forever instead of revalidating.
+    """
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+def _local_url(filename: str) -> Optional[str]:
+    """Returns the local serve path if the file exists on disk (blocking; call it off the loop)."""
+    # Stored names are flat; separators or NUL can only be probes (NUL also makes resolve() raise)
+    if any(c in filename for c in ("/", "\\", "\x00")):
+        return None
+    try:
+        path = (UPLOAD_ROOT / filename).resolve()
+    except (ValueError, OSError):
+        return None
+    # Traversal guard: names like ".." must not probe files outside the upload dir
+    if path.is_relative_to(UPLOAD_ROOT) and os.path.exists(path):
+        return f"{SERVE_PREFIX}/{filename}"
+    return None
+
+def _local_urls(filenames: List[str]) -> Dict[str, Optional[str]]:
+    return {name: _local_url(name) for name in filenames}
+
+IMAGE_NOT_FOUND = "Image not found in any storage provider"
+
 @router.get("/{filename}")
 async def get_image_url(
     filename: str,
-    expires_in: int = 3600,
+    expires_in: int = Query(3600, ge=1, le=MAX_URL_EXPIRY_S),
     storage: ImageStorageService = Depends(get_storage_service)
 ):
     """
@@ -31,33 +69,43 @@ async def get_image_url(
         pass
 
     # 2. Check local filesystem fallback
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    if os.path.exists(file_path):
+    local_url = await asyncio.to_thread(_local_url, filename)
+    if local_url:
         # Return the relative path to our serve endpoint
         return {
-            "url": f"/api/images/serve/{filename}",
+            "url": local_url,
             "source": "local"
         }
 
-    raise HTTPException(status_code=404, detail="Image not found in any storage provider")
+    raise HTTPException(status_code=404, detail=IMAGE_NOT_FOUND)
 
-@router.get("/serve/{filename}")
-async def serve_local_image(filename: str):
+@router.post("/urls", response_model=Dict[str, Optional[str]])
+async def get_image_urls(
+    filenames: List[str] = Body(..., max_length=500),
+    expires_in: int = Query(3600, ge=1, le=MAX_URL_EXPIRY_S),
+    storage: ImageStorageService = Depends(get_storage_service)
+):
     """
-    Serves images from the local filesystem. 
-    This is used as the fallback target for get_image_url.
+    Batch resolver: same lookup as GET /{filename}, for many files in one round-trip.
+    Returns { filename: url }, with null for files found in no storage provider.
     """
-    print("serve")
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
-    # Security: Prevent directory traversal (e.g., filename="../../etc/passwd")
-    abs_upload_dir = os.path.abspath(UPLOAD_DIR)
-    abs_file_path = os.path.abspath(file_path)
-    
-    if not abs_file_path.startswith(abs_upload_dir):
-        raise HTTPException(status_code=403, detail="Invalid file path")
-
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="File not found")
-        
-    return FileResponse(file_path)
\ No newline at end of file
+    names = list(dict.fromkeys(filenames))
+
+    # 1. Resolve all cloud URLs concurrently; failures fall through to the local check
+    results = await asyncio.gather(
+        *(storage.get_url(name, expires_in=expires_in) for name in names),
+        return_exceptions=True
+    )
+
+    urls: Dict[str, Optional[str]] = {}
+    unresolved: List[str] = []
+    for name, url in zip(names, results):
+        if isinstance(url, str) and url.startswith("http"):
+            urls[name] = url
+        else:
+            unresolved.append(name)
+
+    # 2. Local filesystem fallback for anything the cloud didn't resolve, in one thread hop
+    if unresolved:
+        urls.update(await asyncio.to_thread(_local_urls, unresolved))
+    return {name: urls[name] for name in names}
@@ -1,31 +1,39 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
 from uuid import UUID as PyUUID
 from auth.dependencies import get_current_user_id
 from models.schemas import ImageWord
-from service_dependencies import get_image_word_service
+from service_dependencies import get_image_word_service, get_readonly_image_word_service
 from services.image_word_service import ImageWordService
 
 router = APIRouter(prefix="", tags=["ImageWords"])
 
-@router.get("/category/{category_id}", response_model=List[ImageWord])
+IMAGE_WORD_NOT_FOUND = "ImageWord not found"
+EMPTY_IMAGE = "Image file is required and cannot be empty."
+CREATE_FAILED = "Error creating image word"
+UPDATE_FAILED = "Update failed"
+
+@router.get("/category/{category_id}", responses={200: {"model": List[ImageWord]}})
 async def get_image_words_by_category_id(
     category_id: int,
     user_id: PyUUID = Depends(get_current_user_id),
-    svc: ImageWordService = Depends(get_image_word_service)
+    svc: ImageWordService = Depends(get_readonly_image_word_service)
 ):
-    return await svc.find_by_category_id(user_id, category_id)
+    # Service output is already validated; dump it once instead of re-validating via response_model
+    words = await svc.find_by_category_id(user_id, category_id)
+    return ORJSONResponse([w.model_dump(mode="json", by_alias=True) for w in words])
 
 @router.get("/{id}", response_model=ImageWord)
 async def get_image_word_by_id(
     id: int,
     user_id: PyUUID = Depends(get_current_user_id),
-    svc: ImageWordService = Depends(get_image_word_service),
+    svc: ImageWordService = Depends(get_readonly_image_word_service),
 ):
     """Retrieves a specific image+word by its ID."""
     iw = await svc.find_by_id(user_id, id)
     if not iw:
-        raise HTTPException(status_code=404, detail="ImageWord not found")
+        raise HTTPException(status_code=404, detail=IMAGE_WORD_NOT_FOUND)
     return iw
 
 @router.post("/category/{category_id}", response_model=ImageWord, status_code=201)
@@ -38,10 +46,13 @@ async def create_image_word(
     svc: ImageWordService = Depends(get_image_word_service),
 ):
     """Creates a new image+word for a given category with a file upload."""
+    if not imageFile.size:
+        raise HTTPException(status_code=400, detail=EMPTY_IMAGE)
+
     try:
         return await svc.save(user_id, category_id, word, word_osastav, imageFile)
     except Exception:
-        raise HTTPException(status_code=400, detail="Error creating image word")
+        raise HTTPException(status_code=400, detail=CREATE_FAILED)
 
 @router.put("/{id}", response_model=ImageWord)
 async def update_image_word(
@@ -57,19 +68,20 @@ async def update_image_word(
     try:
         return await svc.update(user_id, id, wordText, word_osastav, category_id, imageFile)
     except ValueError:
-        raise HTTPException(status_code=404, detail="ImageWord not found")
+        raise HTTPException(status_code=404, detail=IMAGE_WORD_NOT_FOUND)
     except Exception:
-        raise HTTPException(status_code=400, detail="Update failed")
+        raise HTTPException(status_code=400, detail=UPDATE_FAILED)
 
 @router.delete("/{id}", status_code=204)
 async def delete_image_word(
     id: int,
+    background_tasks: BackgroundTasks,
     user_id: PyUUID = Depends(get_current_user_id),
     svc: ImageWordService = Depends(get_image_word_service)
 ):
     """Deletes an image+word by its ID."""
     try:
-        await svc.delete_by_id(user_id, id)
+        await svc.delete_by_id(user_id, id, background_tasks)
         return None
     except ValueError:
-        raise HTTPException(status_code=404, detail="ImageWord not found")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=IMAGE_WORD_NOT_FOUND)
\ No newline at end of file
@@ -1,11 +1,12 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, status, Path, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Path, Depends
+from fastapi.responses import ORJSONResponse
 import logging
 from uuid import UUID as PyUUID
 
 from auth.dependencies import get_current_user_id
 from models.schemas import Profile, ProfileCreate
-from service_dependencies import get_profile_service
+from service_dependencies import get_profile_service, get_readonly_profile_service
 from services.profile_service import ProfileService
 
 logger = logging.getLogger(__name__)
@@ -13,20 +14,23 @@ logger = logging.getLogger(__name__)
 router = APIRouter(
     prefix="",
     tags=["Profiles"],
+    default_response_class=ORJSONResponse,
 )
 
 # Corresponds to @GetMapping("/user/{userId}") - Simplified to use authenticated user
 @router.get(
     "/me",
-    response_model=List[Profile],
+    responses={status.HTTP_200_OK: {"model": List[Profile]}},
     status_code=status.HTTP_200_OK,
     summary="Retrieve all profiles for the authenticated user",
 )
 async def get_profiles_by_user_id(
     user_id: PyUUID = Depends(get_current_user_id),
-    profile_service: ProfileService = Depends(get_profile_service),
+    profile_service: ProfileService = Depends(get_readonly_profile_service),
 ):
-    return await profile_service.find_by_user_id(user_id)
+    # Service output is already validated; dump it once instead of re-validating via response_model
+    profiles = await profile_service.find_by_user_id(user_id)
+    return ORJSONResponse([p.model_dump(mode="json", by_alias=True) for p in profiles])
 
 
 @router.get(
@@ -38,7 +42,7 @@ async def get_profiles_by_user_id(
 async def get_profile_by_id(
     id: int = Path(..., description="Profile ID"),
     user_id: PyUUID = Depends(get_current_user_id),
-    profile_service: ProfileService = Depends(get_profile_service),
+    profile_service: ProfileService = Depends(get_readonly_profile_service),
 ):
     profile = await profile_service.find_by_id(id, user_id)
     if not profile:
@@ -76,8 +80,9 @@ async def create_profile(
     summary="Delete a profile by ID",
 )
 async def delete_profile(
+    background_tasks: BackgroundTasks,
     id: int = Path(..., description="Profile ID"),
     user_id: PyUUID = Depends(get_current_user_id),
     profile_service: ProfileService = Depends(get_profile_service),
 ):
-    await profile_service.delete_by_id(id, user_id)
\ No newline at end of file
+    await profile_service.delete_by_id(id, user_id, background_tasks)
\ No newline at end of file
@@ -2,17 +2,18 @@ import base64
 from typing import Optional
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
 
 from models.tts_schemas import TtsRequest, TtsResponse
-from services.tts_service import TtsService
+from services.tts_service import DEFAULT_HEADERS, TtsService
 
 router = APIRouter()
 
 # Global dependency: This httpx client will be closed automatically in main.py's lifespan
 _http_client: Optional[httpx.AsyncClient] = None
 
-def get_tts_service() -> TtsService:
+async def get_tts_service() -> TtsService:
     """Dependency function to get the initialized TTS Service."""
     if _http_client is None:
         # Should not happen if the client is initialized in main.py lifespan, 
@@ -23,7 +24,7 @@ def get_tts_service() -> TtsService:
 
 @router.post(
     "/audio", 
-    response_model=TtsResponse,
+    responses={status.HTTP_200_OK: {"model": TtsResponse}},
     summary="Generate Base64-encoded WAV audio from text.",
     status_code=status.HTTP_200_OK
 )
@@ -46,10 +47,8 @@ async def generate_audio(
         # 2. Encode the audio bytes to a Base64 string
         audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
 
-        # 3. Construct the structured response DTO and return
-        return TtsResponse(
-            audioBase64=audio_base64
-        )
+        # 3. Return the TtsResponse shape directly; the single str field needs no validation pass
+        return ORJSONResponse({"audioBase64": audio_base64})
 
     except HTTPException:
         # Re-raise exceptions intended for the client (e.g., 400, 503)
@@ -61,13 +60,60 @@ async def generate_audio(
             detail=f"An unexpected server error occurred: {type(e).__name__}"
         )
 
+@router.post(
+    "/audio/raw",
+    response_class=StreamingResponse,
+    responses={status.HTTP_200_OK: {"content": {"audio/wav": {}}}},
+    summary="Stream raw WAV audio generated from text.",
+    status_code=status.HTTP_200_OK
+)
+async def generate_audio_raw(
+    request_data: TtsRequest,
+    tts_service: TtsService = Depends(get_tts_service)
+):
+    """
+    Generates audio from the input text parameters and streams the WAV bytes
+    straight through from the TTS API, without Base64 encoding or buffering.
+    """
+    stream = tts_service.text_to_speech_stream(
+        text=request_data.sentence,
+        speaker=request_data.speaker,
+        speed=request_data.speed
+    )
+
+    # Pull the first chunk before responding so upstream failures still map to an HTTP error status
+    try:
+        first_chunk = await anext(stream, b"")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected server error occurred: {type(e).__name__}"
+        )
+
+    async def body():
+        yield first_chunk
+        async for chunk in stream:
+            yield chunk
+
+    return StreamingResponse(body(), media_type="audio/wav")
+
 # --- Lifespan integration ---
 # Define the client management functions to be called by main.py
 @asynccontextmanager
 async def tts_lifespan_manager(app):
     global _http_client
     print("TTS Service Startup: Initializing httpx.AsyncClient.")
-    _http_client = httpx.AsyncClient(timeout=15.0)
+    # One pooled HTTP/2 client per worker; concurrent TTS calls multiplex over a few
+    # long-lived TLS connections instead of paying a handshake each. A saturated pool
+    # fails fast (pool=5s) rather than queueing for the full read timeout.
+    _http_client = httpx.AsyncClient(
+        http2=True,
+        headers=DEFAULT_HEADERS,
+        timeout=httpx.Timeout(15.0, connect=3.0, pool=5.0),
+        limits=httpx.Limits(max_keepalive_connections=64, max_connections=128, keepalive_expiry=60.0),
+    )
     yield
     print("TTS Service Shutdown: Closing httpx.AsyncClient.")
     await _http_client.aclose()
\ No newline at end of file
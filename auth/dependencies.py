@@ -1,25 +1,31 @@
+from functools import lru_cache
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import logging
-from typing import Union, Dict, Any
-import uuid
+from typing import Tuple, Union, Dict, Any
 from uuid import UUID as PyUUID
 
-from .jwt_handler import JWTHandler 
+from .jwt_handler import JWTHandler, decode_user_id
 
 logger = logging.getLogger(__name__)
 
 # Initialize the HTTPBearer scheme to manage authorization header extraction
 security_scheme = HTTPBearer()
 
-def get_current_user_id(
-    credentials: HTTPAuthorizationCredentials = Depends(security_scheme)
-) -> PyUUID:
+UNAUTH_INVALID = "Invalid or expired authentication token."
+UNAUTH_MISSING_USER = "Invalid token structure: User ID missing."
+UNAUTH_BAD_USER = "Invalid token structure: User ID format is invalid."
+
+@lru_cache(maxsize=10_000)
+def _verify_token(token: str) -> Tuple[PyUUID, float]:
     """
-    FastAPI Dependency to validate the JWT and return the authenticated user's ID.
+    Decodes and validates the JWT, returning the user's ID and the token expiry.
+    Cached by the raw token string: a hit means this exact signed token was
+    already verified, so repeated requests skip the signature check.
+    Failures raise and are therefore never cached.
     """
-    token = credentials.credentials
-    logger.debug(f"Attempting to validate token: {token[:20]}...")
+    logger.debug("Attempting to validate token: %s...", token[:20])
 
     # Decode and validate the token
     decoded_payload: Union[Dict[str, Any], None] = JWTHandler.decode_jwt(token)
@@ -28,7 +34,7 @@ def get_current_user_id(
         # Invalid or expired token path (raises HTTPException)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired authentication token.",
+            detail=UNAUTH_INVALID,
             headers={"WWW-Authenticate": "Bearer"},
         )
 
@@ -36,20 +42,37 @@ def get_current_user_id(
     user_id_str = decoded_payload.get("user_id")
     
     if not user_id_str:
-         raise HTTPException(
+        raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token structure: User ID missing.",
+            detail=UNAUTH_MISSING_USER,
             headers={"WWW-Authenticate": "Bearer"},
         )
     try:
         # Convert the string from the token into a real UUID object
-        user_id_uuid = uuid.UUID(user_id_str)
+        user_id_uuid = decode_user_id(user_id_str)
         logger.info(f"User ID {user_id_uuid} successfully authenticated.")
-        return user_id_uuid
+        return user_id_uuid, float(decoded_payload["exp"])
     except ValueError:
         # This handles cases where the token has a "user_id" that isn't a valid UUID format
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token structure: User ID format is invalid.",
+            detail=UNAUTH_BAD_USER,
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme)
+) -> PyUUID:
+    """
+    FastAPI Dependency to validate the JWT and return the authenticated user's ID.
+    """
+    user_id, expires_at = _verify_token(credentials.credentials)
+
+    # A cached token may have expired since it was first verified
+    if expires_at < time.time():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=UNAUTH_INVALID,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
@@ -1,11 +1,15 @@
-from datetime import datetime, timedelta, timezone
+import base64
+import hashlib
+import ssl
 import time
 from typing import Dict, Any, Optional
 from uuid import UUID as PyUUID
 from config import settings
 
 import jwt
+import orjson
 from jwt import PyJWTError
+from jwt.api_jws import PyJWS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,10 +17,45 @@ logger = logging.getLogger(__name__)
 # NOTE: In a real application, SECRET_KEY should be loaded securely from an environment variable.
 JWT_SECRET = settings.jwt_secret
 JWT_ALGORITHM = "HS256"
+TOKEN_LIFETIME_S = 24 * 60 * 60
+
+# Key material and signer prepared once instead of per token
+_JWT_KEY = JWT_SECRET.encode("utf-8")
+_JWS = PyJWS(algorithms=[JWT_ALGORITHM])
 
 # Define a type hint for the decoded token payload
 DecodedPayload = Dict[str, Any]
 
+def encode_user_id(user_id: PyUUID) -> str:
+    """Compact 22-char urlsafe base64 of the UUID's 16 raw bytes (no padding)."""
+    return base64.urlsafe_b64encode(user_id.bytes).rstrip(b"=").decode("ascii")
+
+def decode_user_id(value: str) -> PyUUID:
+    """
+    Reverses encode_user_id. Tokens issued before the compact form carry the
+    36-char hex string, which is still accepted. Raises ValueError if neither parses.
+    """
+    if len(value) == 22:
+        try:
+            return PyUUID(bytes=base64.urlsafe_b64decode(value + "=="))
+        except (ValueError, TypeError):
+            pass
+    return PyUUID(value)
+
+def log_crypto_backend() -> None:
+    """
+    Logs which SHA-256 implementation backs HS256. OpenSSL 3 dispatches to the
+    CPU's SHA extensions (SHA-NI / ARMv8 Crypto) when they are present.
+    """
+    openssl_backed = hashlib.sha256.__name__.startswith("openssl_")
+    if openssl_backed and ssl.OPENSSL_VERSION_INFO >= (3,):
+        logger.info(f"JWT HS256 uses OpenSSL SHA-256 ({ssl.OPENSSL_VERSION}).")
+    else:
+        logger.warning(
+            f"JWT HS256 is not using OpenSSL 3 SHA-256 (backend: {hashlib.sha256.__name__}, "
+            f"{ssl.OPENSSL_VERSION}); token signing and verification will be slower."
+        )
+
 class JWTHandler:
     """
     Handles JWT encoding, decoding, and validation.
@@ -27,13 +66,15 @@ class JWTHandler:
         """
         Creates a JWT token payload containing the user ID and expiration time.
         """
+        now = int(time.time())
         payload = {
-            "user_id": str(user_id),
-            "exp": datetime.now(timezone.utc) + timedelta(days=1),
-            "iat": datetime.now(timezone.utc)
+            "user_id": encode_user_id(user_id),
+            "exp": now + TOKEN_LIFETIME_S,
+            "iat": now
         }
         
-        token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+        # Claims are already plain ints/strings, so sign the serialized bytes directly
+        token = _JWS.encode(orjson.dumps(payload), _JWT_KEY, algorithm=JWT_ALGORITHM)
         logger.info(f"JWT created for user: {user_id}")
         return {"token": token}
 
@@ -47,7 +88,7 @@ class JWTHandler:
         """
         try:
             # 1. Decode the token using the secret and algorithm
-            decoded_token: DecodedPayload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            decoded_token: DecodedPayload = jwt.decode(token, _JWT_KEY, algorithms=[JWT_ALGORITHM])
             
             # 2. Check for expiration
             if decoded_token.get("exp", 0) >= time.time():
@@ -1,17 +1,34 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
+from config import settings
+
+# bcrypt releases the GIL while hashing, so a thread per core runs hashes in parallel
+# without blocking the event loop or competing with the default threadpool
+_BCRYPT_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="bcrypt")
 
-def hash_password(password: str) -> str:
+def _hash_password(password: str) -> str:
     pwd_bytes = password.encode('utf-8')
     
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(pwd_bytes, salt)
     
     return hashed.decode('utf-8')
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         password_bytes = plain_password.encode('utf-8')
         hashed_bytes = hashed_password.encode('utf-8')
         return bcrypt.checkpw(password_bytes, hashed_bytes)
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_BCRYPT_POOL, _hash_password, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        _BCRYPT_POOL, _verify_password, plain_password, hashed_password
+    )
\ No newline at end of file
@@ -17,6 +17,15 @@ class Settings(BaseSettings):
     sender_email: str = ""
 
     default_pin: str = "9999"
+    # bcrypt work factor (2^rounds); existing hashes keep the cost they were made with
+    bcrypt_rounds: int = 12
+
+    # Worker threads available to run_in_threadpool (sync endpoints and dependencies)
+    thread_pool_size: int = 64
+    # Worker processes for estnltk morphology (each loads its own analyzer)
+    morph_workers: int = 2
+    # Upstream TTS requests in flight per worker; the rest queue instead of piling on
+    tts_max_concurrency: int = 16
 
     storage_type: str = "CLOUDFLARE"
     r2_bucket_name: str = ""
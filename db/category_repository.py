@@ -1,37 +1,86 @@
 import logging
 from typing import Any, Dict, List, Optional
 from fastapi import HTTPException, status
-from sqlalchemy import and_, delete, select
+from sqlalchemy import and_, bindparam, delete, exists, func, insert, lambda_stmt, select, update
 from uuid import UUID as PyUUID
 from sqlalchemy.exc import NoResultFound, SQLAlchemyError
-from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from db.base_repository import BaseRepository
-from db.models import CategoryModel, ProfileModel
+from db.image_word_repository import IMAGE_WORD_COLUMNS
+from db.models import CategoryModel, ImageWordModel, ProfileModel
 from models.schemas import CategoryCreate
 
 logger = logging.getLogger(__name__)
 
+CATEGORY_COLUMNS = (
+    CategoryModel.id,
+    CategoryModel.profile_id,
+    CategoryModel.name,
+    CategoryModel.image_url,
+)
+
+# Hot lookup built and cached once; each call only supplies bind parameters
+_FIND_CATEGORY_BY_ID = lambda_stmt(
+    lambda: select(CategoryModel)
+    .join(ProfileModel, CategoryModel.profile_id == ProfileModel.id)
+    .filter(and_(CategoryModel.id == bindparam("category_id"), ProfileModel.user_id == bindparam("user_id")))
+)
+
+async def load_category_rows(session: AsyncSession, *criteria: Any) -> List[Dict[str, Any]]:
+    """
+    Core read of the categories matching criteria, each with its "items" list of
+    image word rows stitched in. Two queries in total, no ORM instances.
+    """
+    result = await session.execute(
+        select(*CATEGORY_COLUMNS).where(*criteria).order_by(CategoryModel.id)
+    )
+    categories = [dict(row) for row in result.mappings()]
+    if not categories:
+        return categories
+
+    by_id: Dict[int, Dict[str, Any]] = {}
+    for category in categories:
+        category["items"] = []
+        by_id[category["id"]] = category
+
+    items = await session.execute(
+        select(*IMAGE_WORD_COLUMNS)
+        .where(ImageWordModel.category_id.in_(list(by_id)))
+        .order_by(ImageWordModel.id)
+    )
+    for row in items.mappings():
+        by_id[row["category_id"]]["items"].append(dict(row))
+
+    return categories
+
 class CategoryRepository(BaseRepository[CategoryModel]):
     async def find_category_by_id(self, user_id: PyUUID, category_id: int) -> Optional[CategoryModel]:
         """Fetch category and verify it belongs to one of the user's profiles."""
-        query = (
-            select(CategoryModel)
-            .join(ProfileModel, CategoryModel.profile_id == ProfileModel.id)
-            .filter(and_(CategoryModel.id == category_id, ProfileModel.user_id == user_id))
+        result = await self.session.execute(
+            _FIND_CATEGORY_BY_ID, {"category_id": category_id, "user_id": user_id}
         )
-        result = await self.session.execute(query)
         return result.scalar_one_or_none()
+
+    async def find_category_row(self, user_id: PyUUID, category_id: int) -> Optional[Dict[str, Any]]:
+        """Core read of a single owned category with its items, for read-only responses."""
+        user_profiles = select(ProfileModel.id).where(ProfileModel.user_id == user_id)
+        rows = await load_category_rows(
+            self.session,
+            CategoryModel.id == category_id,
+            CategoryModel.profile_id.in_(user_profiles),
+        )
+        return rows[0] if rows else None
     
-    
-    async def find_by_profile(self, user_id: PyUUID, profile_id: int) -> List[CategoryModel]:
-        stmt = (
-            select(CategoryModel)
-            .join(ProfileModel)
-            .where(CategoryModel.profile_id == profile_id, ProfileModel.user_id == user_id)
+    async def find_by_profile(self, user_id: PyUUID, profile_id: int) -> List[Dict[str, Any]]:
+        """Read-only list of a profile's categories (with items) as plain dicts."""
+        user_profiles = select(ProfileModel.id).where(ProfileModel.user_id == user_id)
+        return await load_category_rows(
+            self.session,
+            CategoryModel.profile_id == profile_id,
+            CategoryModel.profile_id.in_(user_profiles),
         )
-        result = await self.session.execute(stmt)
-        return list(result.scalars().all())
     
     async def save_many(
         self, 
@@ -48,32 +97,36 @@ class CategoryRepository(BaseRepository[CategoryModel]):
         try:
             # 1. Extract unique profile IDs and verify ownership in one query
             profile_ids = list(set(dto.profile_id for dto in category_dtos))
-            ownership_check = (
-                select(ProfileModel.id)
-                .where(
-                    ProfileModel.id.in_(profile_ids),
-                    ProfileModel.user_id == user_id
+            if len(profile_ids) == 1:
+                # Usual case (one profile per batch): EXISTS stops at the first matching index entry
+                owned = await self.session.scalar(
+                    select(exists().where(ProfileModel.id == profile_ids[0], ProfileModel.user_id == user_id))
                 )
-            )
-            result = await self.session.execute(ownership_check)
-            owned_profiles = result.scalars().all()
+            else:
+                owned_count = await self.session.scalar(
+                    select(func.count())
+                    .select_from(ProfileModel)
+                    .where(ProfileModel.id.in_(profile_ids), ProfileModel.user_id == user_id)
+                )
+                owned = owned_count == len(profile_ids)
 
-            if len(owned_profiles) != len(profile_ids):
+            if not owned:
                 raise NoResultFound("Unauthorized or missing profile access for one or more categories.")
 
-            # 2. Batch instantiate
-            categories = [
-                CategoryModel(
-                    profile_id=dto.profile_id,
-                    name=dto.name,
-                    image_url=dto.image_url,
-                    items=[]
-                )
-                for dto in category_dtos
-            ]
-            
-            self.session.add_all(categories)
-            await self.session.flush()
+            # 2. Bulk INSERT ... RETURNING in one statement, bypassing the unit of work
+            stmt = insert(CategoryModel).returning(CategoryModel, sort_by_parameter_order=True)
+            result = await self.session.execute(
+                stmt,
+                [
+                    {"profile_id": dto.profile_id, "name": dto.name, "image_url": dto.image_url}
+                    for dto in category_dtos
+                ]
+            )
+            categories = list(result.scalars().all())
+
+            # New categories have no words yet; mark items loaded so reading it never lazy-loads
+            for category in categories:
+                set_committed_value(category, "items", [])
             
             return categories
 
@@ -91,27 +144,10 @@ class CategoryRepository(BaseRepository[CategoryModel]):
         """
         Saves a single category by delegating to the bulk save logic.
         """
+        # save_many's INSERT ... RETURNING hands back complete rows, id included; nothing to refresh
         results = await self.save_many(user_id, [category_dto])
-        category = results[0]
-        
-        # Refresh for single save to ensure any DB-generated defaults are loaded
-        await self.session.refresh(category)
-        return category
+        return results[0]
     
-    async def get_category_with_words(self, user_id: PyUUID, category_id: int) -> Optional[CategoryModel]:
-        """Fetch category with all its image-words loaded, verified by user_id."""
-        query = (
-            select(CategoryModel)
-            .join(ProfileModel, CategoryModel.profile_id == ProfileModel.id)
-            .where(
-                CategoryModel.id == category_id, 
-                ProfileModel.user_id == user_id
-            )
-            .options(selectinload(CategoryModel.items))
-        )
-        result = await self.session.execute(query)
-        return result.scalar_one_or_none()
-
     async def update_fields(
         self, 
         user_id: PyUUID, 
@@ -122,28 +158,29 @@ class CategoryRepository(BaseRepository[CategoryModel]):
         Updates specific fields of a category after verifying ownership.
         """
         try:
-            # Re-using logic: Find the category while joining Profile to ensure ownership
-            query = (
-                select(CategoryModel)
-                .join(ProfileModel)
-                .where(
-                    CategoryModel.id == category_id, 
-                    ProfileModel.user_id == user_id
+            values = {
+                key: value for key, value in update_data.items()
+                if hasattr(CategoryModel, key) and value is not None
+            }
+
+            if values:
+                # Ownership check, update and reload in a single UPDATE ... RETURNING round-trip
+                user_profiles = select(ProfileModel.id).where(ProfileModel.user_id == user_id)
+                stmt = (
+                    update(CategoryModel)
+                    .where(CategoryModel.id == category_id, CategoryModel.profile_id.in_(user_profiles))
+                    .values(**values)
+                    .returning(CategoryModel)
+                    .execution_options(populate_existing=True)
                 )
-            )
-            result = await self.session.execute(query)
-            category = result.scalar_one_or_none()
+                result = await self.session.execute(stmt)
+                category = result.scalar_one_or_none()
+            else:
+                category = await self.find_category_by_id(user_id, category_id)
 
             if not category:
                 raise NoResultFound(f"Category {category_id} not found or unauthorized.")
 
-            # Set attributes dynamically
-            for key, value in update_data.items():
-                if hasattr(category, key) and value is not None:
-                    setattr(category, key, value)
-            
-            await self.session.flush()
-            await self.session.refresh(category)
             return category
 
         except NoResultFound as e:
@@ -153,12 +190,30 @@ class CategoryRepository(BaseRepository[CategoryModel]):
             logger.error(f"Update Category Error: {e}")
             raise HTTPException(status_code=500, detail="Failed to update category.")
 
-    async def delete_category_by_id(self, user_id: PyUUID, category_id: int) -> bool:
+    async def delete_category_returning_image_urls(self, user_id: PyUUID, category_id: int) -> Optional[List[str]]:
+        """
+        Deletes the category (its words go with it via ON DELETE CASCADE) and returns the
+        image URLs of the category and its words, or None if the user owns no such category.
+        One statement: the data-modifying CTE's siblings still read the pre-delete rows.
+        """
         user_profiles = select(ProfileModel.id).where(ProfileModel.user_id == user_id)
-        stmt = (
+        deleted = (
             delete(CategoryModel)
             .where(CategoryModel.id == category_id, CategoryModel.profile_id.in_(user_profiles))
-            .returning(CategoryModel.id)
+            .returning(CategoryModel.id, CategoryModel.image_url)
+            .cte("deleted_category")
+        )
+        word_urls = (
+            select(ImageWordModel.category_id, ImageWordModel.image_url)
+            .where(ImageWordModel.category_id == category_id)
+            .subquery("word_urls")
+        )
+        stmt = select(deleted.c.image_url, word_urls.c.image_url.label("word_image_url")).select_from(
+            deleted.outerjoin(word_urls, word_urls.c.category_id == deleted.c.id)
         )
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none() is not None
\ No newline at end of file
+        rows = result.all()
+        if not rows:
+            return None
+        urls = [rows[0].image_url] + [row.word_image_url for row in rows]
+        return [url for url in urls if url]
\ No newline at end of file
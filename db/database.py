@@ -2,7 +2,9 @@ import logging
 import os
 from typing import AsyncGenerator
 
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
 
 from .models import Base
 from config import settings
@@ -15,11 +17,20 @@ DATABASE_URL = settings.database_url
 
 async_engine = create_async_engine(
     DATABASE_URL,
-    pool_size=10,                # Maintain up to 10 keep-alive connections
-    max_overflow=20,             # Allow up to 20 extra connections during spikes
-    pool_recycle=3600,           # Refresh connections older than 1 hour
+    pool_size=20,                # Maintain up to 20 keep-alive connections
+    max_overflow=40,             # Allow up to 40 extra connections during spikes
+    pool_timeout=30,             # Fail a checkout after 30s instead of queueing forever
+    pool_use_lifo=True,          # Reuse the most recent connection so surplus ones go idle and get recycled
+    pool_recycle=1800,           # Refresh connections older than 30 minutes
     pool_pre_ping=True,          # Check if connection is alive before every request
-    echo=False                   # Set to True only for local debugging
+    echo=False,                  # Set to True only for local debugging
+    connect_args={
+        # Per-connection LRU of asyncpg prepared statements (default 100); every
+        # repository query reuses its server-side plan instead of re-parsing
+        "prepared_statement_cache_size": 1024,
+        # asyncpg's own statement cache, used for its internal and ad-hoc queries
+        "statement_cache_size": 1024,
+    },
 )
 AsyncSessionFactory = async_sessionmaker(
     bind=async_engine,
@@ -27,10 +38,53 @@ AsyncSessionFactory = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Same pool, but each statement runs on its own without BEGIN/COMMIT. Only for
+# read-only endpoints; the isolation level is reset when the connection is returned.
+ReadOnlySessionFactory = async_sessionmaker(
+    bind=async_engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+# Core UPDATE/DELETE/INSERT statements don't show up in session.new/dirty/deleted,
+# so writes are flagged on the session to tell get_db whether a commit is needed.
+@event.listens_for(Session, "do_orm_execute")
+def _flag_statement_writes(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush_writes(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_write_flag(session):
+    session.info.pop("has_writes", None)
+
+# Columns added after tables already existed in deployments; create_all never alters
+# existing tables, so each is added idempotently. Existing users start unflagged and
+# are flagged by their next login's profile check.
+_ADD_MISSING_COLUMNS = (
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS has_default_profile BOOLEAN NOT NULL DEFAULT false",
+)
+
+# Indexes declared on the models after their tables existed, for the same reason.
+# (user_id, id) supersedes the old single-column profiles index, which is dropped after.
+_ADD_MISSING_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_profiles_user_id_id ON profiles (user_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_categories_profile_id ON categories (profile_id)",
+    "CREATE INDEX IF NOT EXISTS ix_image_words_category_id ON image_words (category_id)",
+    "DROP INDEX IF EXISTS ix_profiles_user_id",
+)
+
 async def create_all_tables():
     """Creates all defined tables in the database."""
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for ddl in _ADD_MISSING_COLUMNS + _ADD_MISSING_INDEXES:
+            await conn.execute(text(ddl))
     logger.info("Database tables created successfully.")
 
 # --- 2. Database Session Dependency ---
@@ -39,9 +93,18 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionFactory() as session:
         try:
             yield session
-            await session.commit()
+            # Read-only requests (or ones the service already committed) skip the COMMIT;
+            # close() below just ends the read transaction when the connection is released
+            pending = session.new or session.dirty or session.deleted
+            if session.in_transaction() and (pending or session.info.get("has_writes")):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+async def get_db_readonly() -> AsyncGenerator[AsyncSession, None]:
+    """Session for endpoints that only read: no transaction is opened at all."""
+    async with ReadOnlySessionFactory() as session:
+        yield session
\ No newline at end of file
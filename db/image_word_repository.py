@@ -1,7 +1,7 @@
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
-from sqlalchemy import delete, select, update
+from sqlalchemy import bindparam, delete, insert, lambda_stmt, select, update
 from uuid import UUID as PyUUID
 from sqlalchemy.exc import NoResultFound, SQLAlchemyError
 
@@ -11,20 +11,34 @@ from models.schemas import ImageWordCreate
 
 logger = logging.getLogger(__name__)
 
+# Columns for Core (non-ORM) reads; rows come back as plain dicts for the schemas
+IMAGE_WORD_COLUMNS = (
+    ImageWordModel.id,
+    ImageWordModel.category_id,
+    ImageWordModel.word,
+    ImageWordModel.word_osastav,
+    ImageWordModel.image_url,
+)
+
+# Hot lookup built and cached once; each call only supplies bind parameters
+_FIND_IMAGE_WORD_BY_ID = lambda_stmt(
+    lambda: select(ImageWordModel)
+    .join(CategoryModel).join(ProfileModel)
+    .where(ImageWordModel.id == bindparam("word_id"), ProfileModel.user_id == bindparam("user_id"))
+)
+
 class ImageWordRepository(BaseRepository[ImageWordModel]):
     async def find_image_word_by_id(self, user_id: PyUUID, word_id: int) -> Optional[ImageWordModel]:
-        stmt = (
-            select(ImageWordModel)
-            .join(CategoryModel).join(ProfileModel)
-            .where(ImageWordModel.id == word_id, ProfileModel.user_id == user_id)
+        result = await self.session.execute(
+            _FIND_IMAGE_WORD_BY_ID, {"word_id": word_id, "user_id": user_id}
         )
-        result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
     
 
-    async def get_image_words_by_category(self, user_id: PyUUID, category_id: int) -> List[ImageWordModel]:
+    async def get_image_words_by_category(self, user_id: PyUUID, category_id: int) -> List[Dict[str, Any]]:
+        """Read-only list: plain column rows, skipping ORM instance construction."""
         stmt = (
-            select(ImageWordModel)
+            select(*IMAGE_WORD_COLUMNS)
             .join(CategoryModel)
             .join(ProfileModel)
             .where(
@@ -33,7 +47,7 @@ class ImageWordRepository(BaseRepository[ImageWordModel]):
             )
         )
         result = await self.session.execute(stmt)
-        return list(result.scalars().all())
+        return [dict(row) for row in result.mappings()]
     
 
     async def save_many(
@@ -65,24 +79,23 @@ class ImageWordRepository(BaseRepository[ImageWordModel]):
             if len(owned_categories) != len(category_ids):
                 raise NoResultFound("Unauthorized or missing category access for batch operation.")
 
-            # 2. Batch instantiate
-            words = [
-                ImageWordModel(
-                    category_id=dto.category_id,
-                    word=dto.word,
-                    word_osastav=dto.word_osastav,
-                    image_url=dto.image_url
-                )
-                for dto in word_dtos
-            ]
-            
-            self.session.add_all(words)
-            
-            # 3. Synchronize
-            await self.session.flush()
+            # 2. Bulk INSERT ... RETURNING in one statement, bypassing the unit of work
+            stmt = insert(ImageWordModel).returning(ImageWordModel, sort_by_parameter_order=True)
+            result = await self.session.execute(
+                stmt,
+                [
+                    {
+                        "category_id": dto.category_id,
+                        "word": dto.word,
+                        "word_osastav": dto.word_osastav,
+                        "image_url": dto.image_url,
+                    }
+                    for dto in word_dtos
+                ]
+            )
             
-            # Note: We return the list. Objects are attached to session with IDs.
-            return words
+            # Note: We return the list. Objects are attached to session with IDs, in input order.
+            return list(result.scalars().all())
 
         except NoResultFound:
             raise
@@ -121,6 +134,8 @@ class ImageWordRepository(BaseRepository[ImageWordModel]):
                     )
                     .values(word=word_dto.word, word_osastav=word_dto.word_osastav, image_url=word_dto.image_url)
                     .returning(ImageWordModel)
+                    # RETURNING already carries the new row; overwrite any copy already in the session
+                    .execution_options(populate_existing=True)
                 )
                 result = await self.session.execute(stmt)
                 word = result.scalars().first()
@@ -128,8 +143,6 @@ class ImageWordRepository(BaseRepository[ImageWordModel]):
                 if not word:
                     raise NoResultFound(f"Word {word_id} not found or unauthorized.")
                 
-                await self.session.flush()
-                await self.session.refresh(word)
                 return word
             except NoResultFound:
                 raise
@@ -139,14 +152,15 @@ class ImageWordRepository(BaseRepository[ImageWordModel]):
                 raise HTTPException(status_code=500, detail="Update failed.")
 
         # --- CASE 2: CREATE (Delegates to save_many) ---
+        # save_many's INSERT ... RETURNING hands back complete rows, id included; nothing to refresh
         results = await self.save_many(user_id, [word_dto])
-        word = results[0]
-        
-        # Single items usually require a refresh to load DB defaults for the UI
-        await self.session.refresh(word)
-        return word
+        return results[0]
     
-    async def delete_image_word_by_id(self, user_id: PyUUID, word_id: int) -> bool:
+    async def delete_image_word_returning_url(self, user_id: PyUUID, word_id: int) -> Tuple[bool, Optional[str]]:
+        """
+        Deletes the word if the user owns it and returns (deleted, image_url).
+        Ownership check, delete and URL lookup are one statement.
+        """
         user_allowed_categories = (
             select(CategoryModel.id)
             .join(ProfileModel, CategoryModel.profile_id == ProfileModel.id)
@@ -155,7 +169,8 @@ class ImageWordRepository(BaseRepository[ImageWordModel]):
         stmt = (
             delete(ImageWordModel)
             .where(ImageWordModel.id == word_id, ImageWordModel.category_id.in_(user_allowed_categories))
-            .returning(ImageWordModel.id)
+            .returning(ImageWordModel.image_url)
         )
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none() is not None
\ No newline at end of file
+        row = result.first()
+        return (True, row.image_url) if row is not None else (False, None)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from datetime import datetime
 import uuid
 from uuid import UUID as PyUUID
-from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Text, Boolean, true
+from sqlalchemy import Column, DateTime, Index, Integer, String, ForeignKey, Text, Boolean, false, true
 from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID 
 from typing import TYPE_CHECKING
@@ -31,17 +31,22 @@ class UserModel(Base):
     hashed_password = Column(String, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default=true(), nullable=False)
     pin: Mapped[str] = mapped_column(String, nullable=True)
+    # Set once the user is known to have a profile, so login can skip the profile check
+    has_default_profile: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
     
     profiles = relationship("ProfileModel", back_populates="user", cascade="all, delete-orphan")
 
     def to_user_out(self) -> "UserOut":
         from models.schemas import UserOut
-        return UserOut(id=self.id, email=self.email, is_active=self.is_active)
+        return UserOut.model_construct(id=self.id, email=self.email, is_active=self.is_active)
 
 class ProfileModel(Base):
     __tablename__ = "profiles"
+    # Covers both "all profiles of a user" and the (user_id, id) ownership checks as index-only scans
+    __table_args__ = (Index("ix_profiles_user_id_id", "user_id", "id"),)
+
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False) 
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False) 
     name = Column(String, nullable=False)
     
     user = relationship("UserModel", back_populates="profiles")
@@ -49,6 +54,8 @@ class ProfileModel(Base):
 
 class CategoryModel(Base):
     __tablename__ = "categories"
+    __table_args__ = (Index("ix_categories_profile_id", "profile_id"),)
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False)
@@ -59,6 +66,8 @@ class CategoryModel(Base):
 
 class ImageWordModel(Base):
     __tablename__ = "image_words"
+    __table_args__ = (Index("ix_image_words_category_id", "category_id"),)
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     category_id: Mapped[int] = mapped_column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
     word = Column(String, nullable=False)
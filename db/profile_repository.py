@@ -1,13 +1,16 @@
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID as PyUUID
-from sqlalchemy import select, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy import exists, func, literal_column, select, delete, union_all, update
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.orm import load_only, raiseload, selectinload
 
 from db.base_repository import BaseRepository
 from .models import (
     ProfileModel, 
-    CategoryModel
+    UserModel,
+    CategoryModel,
+    ImageWordModel
 )
 from models.schemas import (
     ProfileCreate
@@ -16,27 +19,114 @@ from models.schemas import (
 
 logger = logging.getLogger(__name__)
 
+# Loads the profile -> categories -> items tree with only the columns the Profile
+# schema reads, and fails loudly instead of lazy-loading anything else
+_PROFILE_TREE = (
+    selectinload(ProfileModel.categories)
+    .options(
+        load_only(CategoryModel.id, CategoryModel.profile_id, CategoryModel.name, CategoryModel.image_url),
+        selectinload(CategoryModel.items).options(
+            load_only(
+                ImageWordModel.id,
+                ImageWordModel.category_id,
+                ImageWordModel.word,
+                ImageWordModel.word_osastav,
+                ImageWordModel.image_url,
+            ),
+            raiseload("*"),
+        ),
+        raiseload("*"),
+    ),
+    raiseload("*"),
+)
+
+# Whole profile tree in one round-trip: each profile row carries its categories
+# (and their items) as a JSON array built by Postgres. Keys match the schema field names.
+_ITEMS_JSON = (
+    select(
+        func.coalesce(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "id", ImageWordModel.id,
+                        "word", ImageWordModel.word,
+                        "word_osastav", ImageWordModel.word_osastav,
+                        "image_url", ImageWordModel.image_url,
+                    ),
+                    ImageWordModel.id,
+                )
+            ),
+            literal_column("'[]'::json"),
+            type_=JSON,
+        )
+    )
+    .where(ImageWordModel.category_id == CategoryModel.id)
+    .scalar_subquery()
+)
+_CATEGORIES_JSON = (
+    select(
+        func.coalesce(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "id", CategoryModel.id,
+                        "profile_id", CategoryModel.profile_id,
+                        "name", CategoryModel.name,
+                        "image_url", CategoryModel.image_url,
+                        "items", _ITEMS_JSON,
+                    ),
+                    CategoryModel.id,
+                )
+            ),
+            literal_column("'[]'::json"),
+            type_=JSON,
+        )
+    )
+    .where(CategoryModel.profile_id == ProfileModel.id)
+    .scalar_subquery()
+)
+
 class ProfileRepository(BaseRepository[ProfileModel]):
-    async def find_all_by_user(self, user_id: PyUUID) -> List[ProfileModel]:
+    async def find_all_by_user(self, user_id: PyUUID) -> List[Dict[str, Any]]:
+        """
+        Read-only profile tree as plain dicts, fetched in a single query:
+        Postgres aggregates each profile's categories and items into JSON.
+        """
         stmt = (
-            select(ProfileModel)
-            .where(ProfileModel.user_id == user_id)
-            .options(
-                selectinload(ProfileModel.categories)
-                .selectinload(CategoryModel.items) 
+            select(
+                ProfileModel.id,
+                ProfileModel.user_id,
+                ProfileModel.name,
+                _CATEGORIES_JSON.label("categories"),
             )
+            .where(ProfileModel.user_id == user_id)
         )
         result = await self.session.execute(stmt)
-        return list(result.scalars().all())
+        return [dict(row) for row in result.mappings()]
+
+    async def user_has_any_profile(self, user_id: PyUUID) -> bool:
+        """EXISTS probe: stops at the first matching index entry and hydrates no rows."""
+        stmt = select(exists().where(ProfileModel.user_id == user_id))
+        return bool(await self.session.scalar(stmt))
+
+    async def clear_profile_flag_if_none_left(self, user_id: PyUUID) -> None:
+        """Unflags the user once their last profile is gone, so the next login re-seeds one."""
+        stmt = (
+            update(UserModel)
+            .where(
+                UserModel.id == user_id,
+                UserModel.has_default_profile,
+                ~exists().where(ProfileModel.user_id == user_id),
+            )
+            .values(has_default_profile=False)
+        )
+        await self.session.execute(stmt)
 
     async def find_by_id(self, user_id: PyUUID, profile_id: int) -> Optional[ProfileModel]:
         stmt = select(ProfileModel).where(
             ProfileModel.id == profile_id,
             ProfileModel.user_id == user_id
-        ).options(
-            selectinload(ProfileModel.categories)
-            .selectinload(CategoryModel.items) 
-        )
+        ).options(*_PROFILE_TREE)
         result = await self.session.execute(stmt)
         return result.scalars().first()
 
@@ -48,11 +138,30 @@ class ProfileRepository(BaseRepository[ProfileModel]):
         await self.session.refresh(profile)
         return profile
 
-    async def delete(self, user_id: PyUUID, profile_id: int) -> bool:
-        stmt = (
+    async def delete_returning_image_urls(self, user_id: PyUUID, profile_id: int) -> Optional[List[str]]:
+        """
+        Deletes the profile (categories and words go with it via ON DELETE CASCADE) and
+        returns every image URL of the tree, or None if the user has no such profile.
+        One statement: the data-modifying CTE's siblings still read the pre-delete rows.
+        """
+        deleted = (
             delete(ProfileModel)
             .where(ProfileModel.id == profile_id, ProfileModel.user_id == user_id)
             .returning(ProfileModel.id)
+            .cte("deleted_profile")
+        )
+        urls = union_all(
+            select(CategoryModel.profile_id, CategoryModel.image_url)
+            .where(CategoryModel.profile_id == profile_id),
+            select(CategoryModel.profile_id, ImageWordModel.image_url)
+            .join(ImageWordModel, ImageWordModel.category_id == CategoryModel.id)
+            .where(CategoryModel.profile_id == profile_id),
+        ).subquery("urls")
+        stmt = select(deleted.c.id, urls.c.image_url).select_from(
+            deleted.outerjoin(urls, urls.c.profile_id == deleted.c.id)
         )
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none() is not None
+        rows = result.all()
+        if not rows:
+            return None
+        return [row.image_url for row in rows if row.image_url]
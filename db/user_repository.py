@@ -1,33 +1,79 @@
+import hashlib
 from typing import Any, Dict, Optional
 from uuid import UUID
-from sqlalchemy import delete, select, update
+from sqlalchemy import bindparam, delete, lambda_stmt, select, update
+from sqlalchemy.dialects.postgresql import insert
 
 from db.base_repository import BaseRepository
 from db.models import PasswordResetToken, UserModel
 from models.schemas import UserCreate
 
 
+def hash_reset_token(token: str) -> str:
+    """
+    Reset tokens are stored as their SHA-256 hex digest, so the raw token
+    only ever exists in the email link.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+# Login and auth lookups, built and cached once; each call only supplies bind parameters
+_GET_BY_EMAIL = lambda_stmt(lambda: select(UserModel).where(UserModel.email == bindparam("email")))
+_GET_BY_ID = lambda_stmt(lambda: select(UserModel).where(UserModel.id == bindparam("user_id")))
+_GET_PIN = lambda_stmt(lambda: select(UserModel.pin).where(UserModel.id == bindparam("user_id")))
+
+
 class UserRepository(BaseRepository[UserModel]):
-    async def create(self, user_data: UserCreate, hashed_password: str) -> UserModel:
-        new_user = UserModel(
-            email=user_data.email, 
-            hashed_password=hashed_password,
+    async def create(self, user_data: UserCreate, hashed_password: str) -> Optional[UserModel]:
+        """
+        Inserts the user in one round trip; None if the email is already registered.
+        The unique index on email decides between concurrent signups.
+        """
+        stmt = (
+            insert(UserModel)
+            .values(email=user_data.email, hashed_password=hashed_password)
+            .on_conflict_do_nothing(index_elements=[UserModel.email])
+            .returning(UserModel)
         )
-        self.session.add(new_user)
-        await self.session.flush() 
-        return new_user
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
 
     async def get_by_email(self, email: str) -> Optional[UserModel]:
-        stmt = select(UserModel).where(UserModel.email == email)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(_GET_BY_EMAIL, {"email": email})
         return result.scalars().first()
     
     async def get_by_id(self, user_id: UUID) -> Optional[UserModel]:
         """Retrieves a user by their primary key UUID."""
-        stmt = select(UserModel).where(UserModel.id == user_id)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(_GET_BY_ID, {"user_id": user_id})
         return result.scalars().first()
     
+    async def get_pin(self, user_id: UUID) -> Optional[str]:
+        """Retrieves only the PIN column, without loading the full user entity."""
+        return await self.session.scalar(_GET_PIN, {"user_id": user_id})
+
+    async def claim_default_profile_seed(self, user_id: UUID) -> bool:
+        """
+        Sets has_default_profile if it was unset; True only for the caller that flipped it.
+        The row lock is held until commit, so a concurrent claim waits and then gets False.
+        """
+        stmt = (
+            update(UserModel)
+            .where(UserModel.id == user_id, UserModel.has_default_profile.is_(False))
+            .values(has_default_profile=True)
+            .returning(UserModel.id)
+        )
+        return await self.session.scalar(stmt) is not None
+
+    async def set_pin_returning_email(self, user_id: UUID, pin: str) -> Optional[str]:
+        """Sets the PIN in one statement; returns the user's email, or None if there is no such user."""
+        stmt = (
+            update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(pin=pin)
+            .returning(UserModel.email)
+        )
+        return await self.session.scalar(stmt)
+
     async def update_user(self, user_id: UUID, data: Dict[str, Any]) -> None:
         """
         Updates specific fields for a user.
@@ -42,8 +88,10 @@ class UserRepository(BaseRepository[UserModel]):
 
     async def get_reset_token_record(self, token: str):
         """Fetches the token record using the provided token string."""
-        query = select(PasswordResetToken).where(PasswordResetToken.token == token)
+        token_hash = hash_reset_token(token)
+        query = select(PasswordResetToken).where(PasswordResetToken.token == token_hash)
         result = await self.session.execute(query)
+        # Comparing digests, not raw tokens, is what keeps lookup timing from leaking the token
         return result.scalar_one_or_none()
 
     async def update_user_password(self, user_id: UUID, hashed_password: str):
@@ -55,7 +103,27 @@ class UserRepository(BaseRepository[UserModel]):
         )
         await self.session.execute(query)
 
-    async def delete_reset_token(self, token: str):
-        """Removes the token record from the database."""
-        query = delete(PasswordResetToken).where(PasswordResetToken.token == token)
-        await self.session.execute(query)
\ No newline at end of file
+    async def consume_reset_token(self, token: str, hashed_password: str) -> bool:
+        """
+        Deletes the token and sets its user's password in one statement (a data-modifying
+        CTE); False if the token was already gone, in which case nothing is updated.
+        """
+        consumed = (
+            delete(PasswordResetToken)
+            .where(PasswordResetToken.token == hash_reset_token(token))
+            .returning(PasswordResetToken.user_id)
+            .cte("consumed_token")
+        )
+        stmt = (
+            update(UserModel)
+            .where(UserModel.id == consumed.c.user_id)
+            .values(hashed_password=hashed_password)
+            .returning(UserModel.id)
+        )
+        return await self.session.scalar(stmt) is not None
+
+    async def delete_reset_token(self, token: str) -> bool:
+        """Removes the token record from the database; False if it was already gone."""
+        query = delete(PasswordResetToken).where(PasswordResetToken.token == hash_reset_token(token))
+        result = await self.session.execute(query)
+        return result.rowcount > 0
\ No newline at end of file
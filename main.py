@@ -1,20 +1,44 @@
+import asyncio
 from typing import List
-from fastapi import FastAPI
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import anyio.to_thread
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from api.endpoints.category_endpoint import router as category_router
-from api.endpoints.estnltk_endpoint import router as estnltk_router
-from api.endpoints.image_endpoint import router as image_router
+from api.endpoints.estnltk_endpoint import router as estnltk_router, estnltk_lifespan_manager, warm_up_morph_pool
+from api.endpoints.image_endpoint import router as image_router, UploadStaticFiles, SERVE_PREFIX, UPLOAD_ROOT
 from api.endpoints.image_word_endpoint import router as image_word_router
 from api.endpoints.profile_endpoint import router as profile_router
 from api.endpoints.tts_endpoint import router as tts_router, tts_lifespan_manager
 from api.endpoints.auth_endpoint import router as auth_router
 from contextlib import asynccontextmanager, AsyncExitStack
 from db.database import create_all_tables
+from services.email_service import close_smtp_connection
+from services.image_storage_service import close_storage_service
+from service_dependencies import get_seeding_service
+from auth.jwt_handler import log_crypto_backend
 from config import settings
 
 # --- Configuration ---
 origins: List[str] = [settings.app_url]
 
+# --- Logging ---
+# Records are handed to a queue and written to stderr by a background thread,
+# so log calls never block the event loop on the actual write.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))  # Final formatting happens in the listener
+logging.basicConfig(level=settings.log_level.upper(), handlers=[_queue_handler])
+logger = logging.getLogger(__name__)
+
 # --- Lifecycle Management ---
 # Use AsyncExitStack to manage multiple context managers gracefully
 @asynccontextmanager
@@ -22,14 +46,33 @@ async def lifespan(app: FastAPI):
     """
     Handles application startup and shutdown events.
     """
+    # Size the shared worker thread pool used by sync endpoints and dependencies
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.thread_pool_size
+
+    _log_listener.start()
     async with AsyncExitStack() as stack:
+        stack.callback(_log_listener.stop)
+        log_crypto_backend()
+
+        # Close the shared SMTP connection and storage client (if opened) on shutdown
+        stack.push_async_callback(close_smtp_connection)
+        stack.push_async_callback(close_storage_service)
+
         # 1. Run the TTS service lifespan manager first
         await stack.enter_async_context(tts_lifespan_manager(app))
+
+        # 2. Start the morphology worker processes
+        await stack.enter_async_context(estnltk_lifespan_manager(app))
         
-        # 2. Ensure all database tables exist
-        await create_all_tables()
+        # 3. Ensure all database tables exist while the morphology workers load EstNLTK
+        # and the seed assets are read (off the loop, priming the cached factory);
+        # startup then takes max(db, warm-up, assets) instead of the sum
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(create_all_tables())
+            tg.create_task(warm_up_morph_pool())
+            tg.create_task(asyncio.to_thread(get_seeding_service))
         
-        print("Application Startup: Database tables checked, TTS manager initialized.")
+        logger.info("Application Startup: Database tables checked, TTS manager and morphology pool initialized.")
         yield
     print("Application Shutdown: All resources released.")
 
@@ -39,6 +82,7 @@ app = FastAPI(
     description="API for AAC app.",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # Rust-backed encoder for every JSON response
 )
 
 # --- ADD CORS MIDDLEWARE ---
@@ -46,10 +90,15 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,             # Allow cookies and authentication headers
-    allow_methods=["*"],                # Allow all HTTP methods (POST, GET, etc.)
-    allow_headers=["*"],
+    allow_methods=("GET", "POST", "PUT", "DELETE"),  # Only the methods the routers expose
+    allow_headers=("Authorization", "Content-Type"),
+    max_age=7200,                       # Let browsers cache preflights up to Chromium's cap
 )
 
+# --- ADD GZIP MIDDLEWARE ---
+# Compresses larger JSON list responses; images and audio are skipped by the default exclude list
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
 # --- Include Routers ---
 app.include_router(estnltk_router, prefix="/api/v1/estnltk", tags=["estnltk"])
 app.include_router(tts_router, prefix="/api/v1/tts", tags=["tts"])
@@ -59,14 +108,22 @@ app.include_router(profile_router, prefix="/api/v1/profiles", tags=["Profiles"])
 app.include_router(image_word_router, prefix="/api/v1/imagewords", tags=["ImageWords"])
 app.include_router(image_router, prefix="/api/v1/images", tags=["images"])
 
+# --- Static Files ---
+# Local uploads are streamed by Starlette directly (fallback target for get_image_url).
+# StaticFiles performs its own directory traversal protection.
+app.mount(SERVE_PREFIX, UploadStaticFiles(directory=UPLOAD_ROOT, check_dir=False), name="uploads")
+
 
 # --- Root Endpoint (Health Check / Documentation Index) ---
+# Constant body, encoded once at import; health probes hit this every few seconds
+_ROOT_BODY = orjson.dumps({
+    "message": "Welcome to the Estonian Morphology API. Authentication services are now available.", 
+    "docs": "See /docs for the OpenAPI documentation (Swagger UI)."
+})
+
 @app.get("/", tags=["root"])
-def read_root():
+async def read_root():
     """
     A simple root endpoint directing users to the API documentation.
     """
-    return {
-        "message": "Welcome to the Estonian Morphology API. Authentication services are now available.", 
-        "docs": "See /docs for the OpenAPI documentation (Swagger UI)."
-    }
\ No newline at end of file
+    return Response(content=_ROOT_BODY, media_type="application/json")
\ No newline at end of file
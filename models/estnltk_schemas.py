@@ -12,18 +12,17 @@ class SentenceRequest(BaseModel):
     
     model_config = ConfigDict(
         populate_by_name=True,
+        json_schema_extra={
+            "examples": [
+                {
+                    "sentence": [
+                        {"word": "Ma tahan", "imageUrl": None}, 
+                        {"word": "sööma", "imageUrl": "https://example.com/eat.png"}
+                    ]
+                }
+            ]
+        },
     )
-    
-    model_config["json_schema_extra"] = {
-        "examples": [
-            {
-                "sentence": [
-                    {"word": "Ma tahan", "imageUrl": None}, 
-                    {"word": "sööma", "imageUrl": "https://example.com/eat.png"}
-                ]
-            }
-        ]
-    }
 
 
 class SentenceResponse(BaseModel):
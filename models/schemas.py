@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import Any, List, Optional
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from uuid import UUID as PyUUID
 
@@ -16,7 +16,9 @@ class CamelModel(BaseModel):
     model_config = ConfigDict(
         alias_generator=to_camel,
         populate_by_name=True,
-        from_attributes=True
+        from_attributes=True,
+        # Instances (e.g. model_construct'ed DB rows) pass response validation as-is
+        revalidate_instances="never",
     )
 
 # --- IMAGE WORD SCHEMAS ---
@@ -39,6 +41,17 @@ class ImageWord(ImageWordBase):
     id: int
     conjugated_word: Optional[str] = None
 
+    @classmethod
+    def from_orm_trusted(cls, row: Any) -> ImageWord:
+        """Builds from a DB row (ORM instance or Core mapping) without validation."""
+        data = row if isinstance(row, dict) else row.__dict__
+        return cls.model_construct(
+            id=data["id"],
+            word=data["word"],
+            word_osastav=data.get("word_osastav"),
+            image_url=data.get("image_url"),
+        )
+
 # --- CATEGORY SCHEMAS ---
 
 class CategoryBase(CamelModel):
@@ -52,9 +65,32 @@ class CategoryCreate(CategoryBase):
 class CategorySimple(CategoryBase):
     id: int
 
+    @classmethod
+    def from_orm_trusted(cls, row: Any) -> CategorySimple:
+        """Builds from a DB row (ORM instance or Core mapping) without validation."""
+        data = row if isinstance(row, dict) else row.__dict__
+        return cls.model_construct(
+            id=data["id"],
+            name=data["name"],
+            image_url=data.get("image_url"),
+            profile_id=data.get("profile_id"),
+        )
+
 class Category(CategorySimple):
     items: List[ImageWord] = Field(default_factory=list)
 
+    @classmethod
+    def from_orm_trusted(cls, row: Any) -> Category:
+        """Same as CategorySimple, plus items; an unloaded ORM relationship counts as empty."""
+        data = row if isinstance(row, dict) else row.__dict__
+        return cls.model_construct(
+            id=data["id"],
+            name=data["name"],
+            image_url=data.get("image_url"),
+            profile_id=data.get("profile_id"),
+            items=[ImageWord.from_orm_trusted(item) for item in data.get("items", ())],
+        )
+
 # --- PROFILE SCHEMAS ---
 
 class ProfileBase(CamelModel):
@@ -80,7 +116,9 @@ class UserLogin(CamelModel):
     email: EmailStr
     password: str
 
-class UserOut(UserBase):
+class UserOut(CamelModel):
+    # Only ever built from our own DB rows, whose emails were validated on the way in
+    email: str
     id: PyUUID
     is_active: bool = True
 
@@ -94,8 +132,3 @@ class Token(CamelModel):
 class ResetPasswordUpdate(CamelModel):
     token: str
     new_password: str
-
-# IMPORTANT: Rebuild models to resolve type hints for FastAPI
-ImageWord.model_rebuild()
-Category.model_rebuild()
-Profile.model_rebuild()
\ No newline at end of file
@@ -1,54 +1,106 @@
+from functools import lru_cache
+from typing import NamedTuple
 from fastapi import Depends
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.category_repository import CategoryRepository
-from db.database import get_db
+from db.database import get_db, get_db_readonly
 from db.image_word_repository import ImageWordRepository
 from db.profile_repository import ProfileRepository
 from db.user_repository import UserRepository
+from services.category_service import CategoryService
 from services.email_service import EmailService
 from services.image_storage_service import ImageStorageService, get_storage_service
+from services.image_word_service import ImageWordService
 from services.profile_service import ProfileService
 from services.seeding_service import SeedingService
 from services.user_service import UserService
 
 logger = logging.getLogger(__name__)
 
-def get_category_service(
-    repo: CategoryRepository = Depends(CategoryRepository),
-    storage: ImageStorageService = Depends(get_storage_service)
-):
-    from services.category_service import CategoryService 
-    return CategoryService(repo, storage)
+class Repos(NamedTuple):
+    """All repositories bound to one request session."""
+    profile: ProfileRepository
+    category: CategoryRepository
+    image_word: ImageWordRepository
+    user: UserRepository
+
+def _build_repos(db: AsyncSession) -> Repos:
+    return Repos(
+        ProfileRepository(session=db),
+        CategoryRepository(session=db),
+        ImageWordRepository(session=db),
+        UserRepository(session=db),
+    )
+
+# FastAPI caches these per request, so services sharing a session also share the repositories
+async def get_repos(db: AsyncSession = Depends(get_db)) -> Repos:
+    return _build_repos(db)
 
-def get_image_word_service(
-    repo: ImageWordRepository = Depends(ImageWordRepository),
+async def get_readonly_repos(db: AsyncSession = Depends(get_db_readonly)) -> Repos:
+    return _build_repos(db)
+
+async def get_category_service(
+    db: AsyncSession = Depends(get_db),
     storage: ImageStorageService = Depends(get_storage_service)
-):
-    from services.image_word_service import ImageWordService 
-    return ImageWordService(repo, storage)
+) -> CategoryService:
+    return CategoryService(CategoryRepository(session=db), storage)
 
-def get_profile_service(
+async def get_image_word_service(
     db: AsyncSession = Depends(get_db),
-    seeding_service = Depends(SeedingService),
+    storage: ImageStorageService = Depends(get_storage_service)
+) -> ImageWordService:
+    return ImageWordService(ImageWordRepository(session=db), storage)
+
+# Preloads the seed assets once; every profile creation reuses the in-memory bytes.
+# main.py's lifespan builds it in a worker thread at startup, so no request does the disk reads.
+@lru_cache(maxsize=1)
+def get_seeding_service() -> SeedingService:
+    return SeedingService()
+
+async def get_profile_service(
+    repos: Repos = Depends(get_repos),
+    seeding_service: SeedingService = Depends(get_seeding_service),
     storage = Depends(get_storage_service)
 ) -> ProfileService:
-    repo = ProfileRepository(session=db)
-    cat_repo = CategoryRepository(session=db)
-    i_w_repo = ImageWordRepository(session=db)
-    
-    from services.profile_service import ProfileService
-    return ProfileService(repo, cat_repo, i_w_repo, seeding_service, storage)
+    return ProfileService(repos.profile, repos.category, repos.image_word, seeding_service, storage)
 
+# Stateless apart from module-level settings, so one instance serves every request
+@lru_cache(maxsize=1)
 def get_email_service() -> EmailService:
     return EmailService()
 
-def get_user_service(
-    db: AsyncSession = Depends(get_db),
+# --- Read-only variants: same services on an AUTOCOMMIT session (GET endpoints only) ---
+
+async def get_readonly_category_service(
+    db: AsyncSession = Depends(get_db_readonly),
+    storage: ImageStorageService = Depends(get_storage_service)
+) -> CategoryService:
+    return CategoryService(CategoryRepository(session=db), storage)
+
+async def get_readonly_image_word_service(
+    db: AsyncSession = Depends(get_db_readonly),
+    storage: ImageStorageService = Depends(get_storage_service)
+) -> ImageWordService:
+    return ImageWordService(ImageWordRepository(session=db), storage)
+
+async def get_readonly_profile_service(
+    repos: Repos = Depends(get_readonly_repos),
+    seeding_service: SeedingService = Depends(get_seeding_service),
+    storage = Depends(get_storage_service)
+) -> ProfileService:
+    return ProfileService(repos.profile, repos.category, repos.image_word, seeding_service, storage)
+
+async def get_readonly_user_service(
+    repos: Repos = Depends(get_readonly_repos),
+    email_service: EmailService = Depends(get_email_service)
+) -> UserService:
+    # Read paths never seed profiles, so no ProfileService is wired in
+    return UserService(repos.user, repos.profile, email_service)
+
+async def get_user_service(
+    repos: Repos = Depends(get_repos),
     profile_service: ProfileService = Depends(get_profile_service),
     email_service: EmailService = Depends(get_email_service)
 ) -> UserService:
-    user_repo = UserRepository(session=db)
-    prof_repo = ProfileRepository(session=db)
-    
-    return UserService(user_repo, prof_repo, email_service, profile_service)
+    return UserService(repos.user, repos.profile, email_service, profile_service)
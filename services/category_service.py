@@ -1,6 +1,6 @@
 import asyncio
 from typing import Optional, List, Tuple
-from fastapi import UploadFile, HTTPException, status
+from fastapi import BackgroundTasks, UploadFile, HTTPException, status
 import logging
 from uuid import UUID as PyUUID
 
@@ -21,15 +21,16 @@ class CategoryService:
 
     async def get_category_by_id(self, user_id: PyUUID, category_id: int) -> Category:
         """
-        Retrieves a category and validates it against the Pydantic model.
+        Retrieves a category with its items. DB rows are trusted, so they are
+        constructed into the schema without re-validation.
         """
-        category = await self.repo.find_category_by_id(user_id, category_id)
+        category = await self.repo.find_category_row(user_id, category_id)
         if not category:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Category not found with ID: {category_id}"
             )
-        return Category.model_validate(category)
+        return Category.from_orm_trusted(category)
 
     async def find_by_profile_id(
         self, 
@@ -40,7 +41,7 @@ class CategoryService:
         Retrieves categories for a profile with ownership validation.
         """
         categories = await self.repo.find_by_profile(user_id, profile_id)
-        return [Category.model_validate(cat) for cat in categories]
+        return [Category.from_orm_trusted(cat) for cat in categories]
 
     async def create_categories_batch(
         self, 
@@ -68,7 +69,7 @@ class CategoryService:
             for name, image_url in results:
                 uploaded_urls.append(image_url)
                 category_data_list.append(
-                    CategoryCreate(
+                    CategoryCreate.model_construct(
                         name=name,
                         image_url=image_url,
                         profile_id=profile_id
@@ -79,13 +80,16 @@ class CategoryService:
             created_records = await self.repo.save_many(user_id, category_data_list)
             await self.repo.session.commit()
             
-            return [Category.model_validate(rec) for rec in created_records]
+            return [Category.from_orm_trusted(rec) for rec in created_records]
 
         except Exception as e:
             # 4. Cleanup: Delete any successfully uploaded images if the DB fails
-            cleanup_tasks = [self.storage_service.delete(url) for url in uploaded_urls]
-            if cleanup_tasks:
-                await asyncio.gather(*cleanup_tasks)
+            if uploaded_urls:
+                # One batched request; a failed cleanup must not mask the original error
+                try:
+                    await self.storage_service.delete_batch(uploaded_urls)
+                except Exception as cleanup_error:
+                    logger.warning(f"Orphaned images left after failed create: {cleanup_error}")
             
             await self.repo.session.rollback()
             logger.error(f"Failed to create categories batch: {e}")
@@ -127,7 +131,7 @@ class CategoryService:
                 detail=f"Category not found"
             )
 
-        old_image_url = str(existing_category.image_url)
+        old_image_url = existing_category.image_url
         new_image_url = None
 
         try:
@@ -143,9 +147,9 @@ class CategoryService:
 
 
             if new_image_url and old_image_url:
-                await self.storage_service.delete(str(old_image_url))
+                await self.storage_service.delete(old_image_url)
 
-            return CategorySimple.model_validate(updated_category)
+            return CategorySimple.from_orm_trusted(updated_category)
 
         except Exception as e:
             if new_image_url:
@@ -158,32 +162,23 @@ class CategoryService:
                 detail="Update failed."
             )
 
-    async def delete_category(self, user_id: PyUUID, category_id: int):
+    async def delete_category(self, user_id: PyUUID, category_id: int, background_tasks: BackgroundTasks):
         """
         Deletes category and all associated word images.
+        The images are removed from storage after the response has been sent.
         """
-        # Fetch category with words eagerly so we have URLs after deletion
-        category = await self.repo.get_category_with_words(user_id, category_id)
-        if not category:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Category not found"
-            )
-        
-        urls_to_delete = []
-        if str(category.image_url):
-            urls_to_delete.append(str(category.image_url))
-
-        for word in category.items:
-            if word.image_url:
-                urls_to_delete.append(str(word.image_url))
-
         try:
-            success = await self.repo.delete_category_by_id(user_id, category_id)
-            if not success:
-                raise HTTPException(status_code=403, detail="Unauthorized delete")
-                
+            # Ownership check, delete and URL collection in one statement
+            urls_to_delete = await self.repo.delete_category_returning_image_urls(user_id, category_id)
+            if urls_to_delete is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Category not found"
+                )
             await self.repo.session.commit()
+        except HTTPException:
+            await self.repo.session.rollback()
+            raise
         except Exception as e:
             await self.repo.session.rollback()
             logger.error(f"Delete failed: {e}")
@@ -192,9 +187,18 @@ class CategoryService:
                 detail="Failed to delete database record."
             )
 
-        # Trigger storage cleanup in background or after-the-fact
+        # The DB is already consistent; storage cleanup runs once the 204 is out
+        if urls_to_delete:
+            background_tasks.add_task(self._delete_images, urls_to_delete)
+
+    async def _delete_images(self, urls: List[str]):
+        """Background storage cleanup; failures only leave orphaned files behind."""
         try:
-            await self.storage_service.delete_batch(urls_to_delete)
+            results = await self.storage_service.delete_batch(urls)
         except Exception as e:
             # TODO In a pro system, you'd log this for a background cleanup task.
-            logger.warning(f"Orphaned image left: {e}")
\ No newline at end of file
+            logger.warning(f"Orphaned images left: {e}")
+            return
+        failed = [url for url, ok in results.items() if not ok]
+        if failed:
+            logger.warning(f"Storage cleanup incomplete for: {failed}")
\ No newline at end of file
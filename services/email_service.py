@@ -1,6 +1,10 @@
+import asyncio
 import logging
-import smtplib
 import ssl
+from string import Template
+from typing import Optional
+
+import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from config import settings
@@ -8,20 +12,52 @@ from config import settings
 logger = logging.getLogger(__name__)
 
 SMTP_SERVER = settings.smtp_server  # e.g., smtp.mailgun.org or smtp.sendgrid.net
-SMTP_PORT = settings.smtp_port                 # Use 587 for STARTTLS
+SMTP_PORT = int(settings.smtp_port)            # Use 587 for STARTTLS
 SMTP_USERNAME = settings.smtp_username
 SMTP_PASSWORD = settings.smtp_password  # Never use your real password; use an App Password
 SENDER_EMAIL = settings.sender_email
 APP_URL = settings.app_url
 
+# One SMTP connection per worker process, shared by every EmailService instance.
+# Sends run as async background tasks on the event loop, so access is serialized by a lock.
+_smtp_connection: Optional[aiosmtplib.SMTP] = None
+_smtp_lock = asyncio.Lock()
+
+# Message bodies are compiled once; each send only substitutes the placeholders
+_PIN_TEXT = Template("Hello,\n\nYour new security PIN is: ${pin}\n\nIf you did not request this, please contact support.")
+_PIN_HTML = Template("""
+        <html>
+            <body>
+                <h2>Security Update</h2>
+                <p>Hello,</p>
+                <p>Your new security PIN is: <strong>${pin}</strong></p>
+                <p style="color: red;">If you did not request this, please contact support immediately.</p>
+            </body>
+        </html>
+        """)
+
+_RESET_TEXT = Template("Hello,\n\nPlease use the following link to reset your password: ${reset_link}\n\nIf you did not request this, please contact support.")
+_RESET_HTML = Template("""
+        <html>
+            <body>
+                <h2 style="color: #333;">Security Update</h2>
+                <p>Hello,</p>
+                <p>We received a request to reset your password. Click the button below to proceed:</p>
+                <p><a href="${reset_link}" style="background-color: #4CAF50; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Reset Password</a></p>
+                <p>Or use this token directly: <strong>${reset_token}</strong></p>
+                <p style="color: red; font-size: 0.8em;">If you did not request this, please contact support immediately.</p>
+            </body>
+        </html>
+        """)
+
 class EmailService:
     def __init__(self):
         self.server = SMTP_SERVER
-        self.port = int(SMTP_PORT)
+        self.port = SMTP_PORT
         self.username = SMTP_USERNAME
         self.password = SMTP_PASSWORD
 
-    def send_pin_reset_email(self, recipient_email: str, new_pin: str):
+    async def send_pin_reset_email(self, recipient_email: str, new_pin: str):
         """
         Constructs and sends a PIN update email via SMTP.
         """
@@ -32,35 +68,20 @@ class EmailService:
         message["To"] = recipient_email
 
         # 2. Create the body (Plain text and HTML)
-        text = f"Hello,\n\nYour new security PIN is: {new_pin}\n\nIf you did not request this, please contact support."
-        html = f"""
-        <html>
-            <body>
-                <h2>Security Update</h2>
-                <p>Hello,</p>
-                <p>Your new security PIN is: <strong>{new_pin}</strong></p>
-                <p style="color: red;">If you did not request this, please contact support immediately.</p>
-            </body>
-        </html>
-        """
+        text = _PIN_TEXT.substitute(pin=new_pin)
+        html = _PIN_HTML.substitute(pin=new_pin)
 
         message.attach(MIMEText(text, "plain"))
         message.attach(MIMEText(html, "html"))
 
         # 3. Send the email
-        # context = ssl.create_default_context()
-        
         try:
-            with smtplib.SMTP(self.server, self.port) as server:
-                # server.starttls(context=context) # Secure the connection
-                # server.login(self.username, self.password)
-                server.set_debuglevel(1)
-                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
+            await self._send(recipient_email, message)
             logger.info(f"Email sent successfully to {recipient_email}")
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
 
-    def send_password_reset_email(self, recipient_email: str, reset_token: str):
+    async def send_password_reset_email(self, recipient_email: str, reset_token: str):
         """
         Constructs and sends a Password Reset email via SMTP.
         Note: Adapted from your PIN update template to handle reset tokens.
@@ -74,33 +95,64 @@ class EmailService:
         # 2. Create the body (Plain text and HTML)
         # Using a link for the token is standard for password resets
         reset_link = f"https://{APP_URL}/#/reset?token={reset_token}"
-        
-        text = f"Hello,\n\nPlease use the following link to reset your password: {reset_link}\n\nIf you did not request this, please contact support."
-        html = f"""
-        <html>
-            <body>
-                <h2 style="color: #333;">Security Update</h2>
-                <p>Hello,</p>
-                <p>We received a request to reset your password. Click the button below to proceed:</p>
-                <p><a href="{reset_link}" style="background-color: #4CAF50; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Reset Password</a></p>
-                <p>Or use this token directly: <strong>{reset_token}</strong></p>
-                <p style="color: red; font-size: 0.8em;">If you did not request this, please contact support immediately.</p>
-            </body>
-        </html>
-        """
+        text = _RESET_TEXT.substitute(reset_link=reset_link)
+        html = _RESET_HTML.substitute(reset_link=reset_link, reset_token=reset_token)
 
         message.attach(MIMEText(text, "plain"))
         message.attach(MIMEText(html, "html"))
 
         # 3. Send the email
-        # context = ssl.create_default_context()
-        
         try:
-            with smtplib.SMTP(self.server, self.port) as server:
-                # server.starttls(context=context) 
-                # server.login(self.username, self.password)
-                server.set_debuglevel(1)
-                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
+            await self._send(recipient_email, message)
             logger.info(f"Reset email sent successfully to {recipient_email}")
         except Exception as e:
-            logger.error(f"Failed to send email: {e}")
\ No newline at end of file
+            logger.error(f"Failed to send email: {e}")
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        """Opens a new SMTP connection."""
+        # context = ssl.create_default_context()
+        server = aiosmtplib.SMTP(hostname=self.server, port=self.port, start_tls=False)
+        await server.connect()
+        # await server.starttls(tls_context=context) # Secure the connection
+        # await server.login(self.username, self.password)
+        return server
+
+    async def _get_client(self) -> aiosmtplib.SMTP:
+        """Returns the shared SMTP connection, connecting on first use. Caller holds _smtp_lock."""
+        global _smtp_connection
+        if _smtp_connection is None or not _smtp_connection.is_connected:
+            _smtp_connection = await self._connect()
+        return _smtp_connection
+
+    async def _send(self, recipient_email: str, message: MIMEMultipart):
+        """
+        Sends a message over the shared SMTP connection, so bursts of emails
+        don't each pay the TCP (+TLS/AUTH) handshake.
+        A dropped connection is only noticed when a send fails; it is then
+        reopened and the send retried once.
+        """
+        global _smtp_connection
+        async with _smtp_lock:
+            client = await self._get_client()
+            try:
+                await client.send_message(message, sender=SENDER_EMAIL, recipients=recipient_email)
+            except (aiosmtplib.SMTPServerDisconnected, OSError):
+                client.close()
+                _smtp_connection = None
+                client = await self._get_client()
+                await client.send_message(message, sender=SENDER_EMAIL, recipients=recipient_email)
+
+
+async def close_smtp_connection():
+    """Sends QUIT on the shared SMTP connection. Registered on the app lifespan."""
+    global _smtp_connection
+    async with _smtp_lock:
+        if _smtp_connection is None:
+            return
+        try:
+            if _smtp_connection.is_connected:
+                await _smtp_connection.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            _smtp_connection.close()
+        finally:
+            _smtp_connection = None
@@ -1,6 +1,33 @@
-from estnltk import Text
+from functools import lru_cache
+from estnltk import Layer, Text
 from estnltk.vabamorf.morf import synthesize
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+# (lemma, sõnaliik) paarid; välimine tuple on sõnade, sisemine analüüside kaupa
+Analyysid = Tuple[Tuple[Tuple[str, str], ...], ...]
+
+# Sõnade teisenduste vahemälu (sõna -> tulemus); igal töötaja protsessil on oma koopia
+_TEISENDUSED: Dict[str, str] = {}
+_TEISENDUSTE_MAX = 10_000
+
+# Võimalikud käivitusfraasid (väiketähtedega, et kontroll oleks üks hulga päring)
+TRIGGER_PHRASES: frozenset = frozenset({"ma tahan"})
+
+# Sõnaliigid, mille puhul moodustatakse ainsuse partitiiv: nimi-, omadus-, arv- ja asesõna
+_KAANDSONALIIGID: frozenset = frozenset({'S', 'A', 'N', 'Num', 'P'})
+
+
+def init_morph_worker() -> None:
+    """
+    Protsessipooli töötaja algatus: laeb EstNLTK analüsaatorid üks kord protsessi kohta,
+    et esimene päring ei peaks seda hinda maksma.
+    """
+    try:
+        Text("tere").tag_layer(['morph_analysis'])
+    except Exception:
+        # Puuduvad andmed ilmnevad esimese päringu ajal niikuinii
+        pass
+
 
 def teisenda_ma_tahan_lauseosa(sisend_loend: List[str]) -> List[str]:
     """
@@ -8,18 +35,10 @@ def teisenda_ma_tahan_lauseosa(sisend_loend: List[str]) -> List[str]:
     käivitusfraasile (nt "Ma tahan"). Konjugatsioon rakendub ainult pärast fraasi.
     Kasutab uuemat EstNLTK kättesaamise süntaksit.
     """
-    
-    # Määrame võimalikud käivitusfraasid
-    TRIGGER_PHRASES = ["ma tahan"]
-    
-    # 1. Leiame esimese käivitusfraasi indeksi
-    trigger_index = -1
-    
-    # Otsime loendist esimest sõna, mis vastab mõnele käivitusfraasile (case-insensitive)
-    for i, word in enumerate(sisend_loend):
-        if word.lower() in TRIGGER_PHRASES:
-            trigger_index = i
-            break
+    # 1. Otsime loendist esimest sõna, mis vastab mõnele käivitusfraasile (case-insensitive)
+    trigger_index = next(
+        (i for i, word in enumerate(sisend_loend) if word.lower() in TRIGGER_PHRASES), -1
+    )
             
     if trigger_index == -1:
         # Kui ühtegi käivitusfraasi pole leitud, tagastame loendi muutmata kujul.
@@ -32,88 +51,152 @@ def teisenda_ma_tahan_lauseosa(sisend_loend: List[str]) -> List[str]:
     # Sõnad, mida on vaja töödelda (sõnad pärast käivitusfraasi)
     sonad_tootlemiseks = sisend_loend[trigger_index + 1:]
     
-    for sona in sonad_tootlemiseks:
-        # Püüame kinni tühjad sõnad või korduvad käivitusfraasid
-        if not sona or sona.isspace() or sona.lower() in TRIGGER_PHRASES:
-            valjund_loend.append(sona)
+    # 2. Kordumatud sõnad, mida vahemälus veel pole, analüüsitakse korraga
+    teisendused: Dict[str, str] = {}
+    uued: List[str] = []
+    for sona in dict.fromkeys(sonad_tootlemiseks):
+        if not _vajab_teisendust(sona):
             continue
+        if sona in _TEISENDUSED:
+            teisendused[sona] = _TEISENDUSED[sona]
+        else:
+            uued.append(sona)
+
+    for sona, analyysid in zip(uued, _analyysi_lause(uued)):
+        teisendused[sona] = _salvesta(sona, _teisenda_analyysist(sona, analyysid))
+
+    # 3. Paneme väljundi kokku; tühjad sõnad ja korduvad käivitusfraasid jäävad muutmata
+    valjund_loend.extend(teisendused.get(sona, sona) for sona in sonad_tootlemiseks)
+
+    return valjund_loend
+
+
+def _vajab_teisendust(sona: str) -> bool:
+    """Tühje sõnu ja korduvaid käivitusfraase ei teisendata."""
+    return bool(sona) and not sona.isspace() and sona.lower() not in TRIGGER_PHRASES
+
+
+def _salvesta(sona: str, tulemus: str) -> str:
+    """Salvestab teisenduse vahemällu (kasvu piiramiseks tühjendatakse see täitumisel)."""
+    if len(_TEISENDUSED) >= _TEISENDUSTE_MAX:
+        _TEISENDUSED.clear()
+    _TEISENDUSED[sona] = tulemus
+    return tulemus
+
+
+def _analyysi_lause(sonad: List[str]) -> List[Optional[Tuple[Tuple[str, str], ...]]]:
+    """
+    Analüüsib kõik sõnad ühe Text objektiga, et EstNLTK torustik käiks läbi üks kord.
+    Iga sõna on eraldi lauses: ühestamine kasutab lause konteksti, nii et tulemus (ja
+    vahemällu jääv teisendus) on sama, mis sõna üksi analüüsides, sõltumata naabritest.
+    Kui tokeniseerija jagab sisendi teisiti kui sõnaloend, analüüsitakse sõnad ükshaaval.
+    None tähendab, et sõna analüüs ebaõnnestus.
+    """
+    if len(sonad) > 1:
+        try:
+            text_obj = Text(" ".join(sonad))
+            text_obj.tag_layer(['words'])
+            if [span.text for span in text_obj['words']] == sonad:
+                laused = Layer(name='sentences', enveloping='words', ambiguous=False, text_object=text_obj)
+                for span in text_obj['words']:
+                    laused.add_annotation([span.base_span])
+                text_obj.add_layer(laused)
+                text_obj.tag_layer(['morph_analysis'])
+                return [
+                    tuple((annotation['lemma'], annotation['partofspeech']) for annotation in span.annotations)
+                    for span in text_obj['morph_analysis']
+                ]
+        except Exception:
+            pass
 
+    tulemused: List[Optional[Tuple[Tuple[str, str], ...]]] = []
+    for sona in sonad:
         try:
-            # 1. Analüüs: Leiame sõnaliigi ja algvormi (lemma)
-            text_obj = Text(sona)
-            # Kasutame morfoloogiliseks analüüsiks (tag) kihti
-            text_obj.tag_layer(['morph_analysis'])
-
-            if not text_obj['morph_analysis'] or not text_obj['morph_analysis'][0].annotations:
-                # Kui analüüs ebaõnnestus (nt tundmatu lühend), jätame sõna muutmata
-                valjund_loend.append(sona)
-                continue
-
-            # Võtame esimese (EstNLTK poolt parimaks peetud) analüüsi
-            analyys = text_obj['morph_analysis'][0].annotations[0]
-            lemma = analyys.get('lemma')
-            sonaliik = analyys.get('partofspeech') # Nt S, A, V, Num
-
-            # Määra soovitud tunnused sõnaliigi järgi
-            soovitud_tunnus = None
-
-            if sonaliik in ['S', 'A', 'N', 'Num', "P"]: # Nimisõna, Omadussõna, Arvsõna, Asesõna
-                # Määrame ainsuse partitiivi (sg p)
-                soovitud_tunnus = "sg p" 
-            elif sonaliik == 'V': # Tegusõna
-                # Määrame da-infinitiivi (da)
-                soovitud_tunnus = "da" 
-            
-            # Kui soovitud tunnus on määratud, proovime sünteesida
-            if soovitud_tunnus:
-                # 2. Generatsioon: Moodustame uue vormi algvormist ja tunnustest
-                try:
-                    # Synthesize tagastab loendi võimalikest vormidest, võtame esimese
-                    genereeritud_vormid = synthesize(lemma, soovitud_tunnus)
-
-                    if genereeritud_vormid:
-                        valjund_loend.append(genereeritud_vormid[-1])
-                    else:
-                        # Kui generatsioon ebaõnnestus, kasutame algvormi
-                        valjund_loend.append(lemma)
-                except Exception:
-                    # Jätame sõna muutmata, kui generatsioon viskab vea
-                    valjund_loend.append(sona)
-            else:
-                # Jätame muud sõnad (sidesõnad, määrsõnad jne.) muutmata
-                valjund_loend.append(sona)
+            analyysid = _analyysi(sona)
+            tulemused.append(analyysid[0] if analyysid else ())
+        except Exception:
+            # Üldine veapüük analüüsi või Text loomise ajal
+            tulemused.append(None)
+    return tulemused
+
 
+def _teisenda_analyysist(sona: str, analyysid: Optional[Tuple[Tuple[str, str], ...]]) -> str:
+    """
+    Teisendab ühe sõna (partitiiv või da-infinitiiv) selle analüüside põhjal.
+    """
+    if not analyysid:
+        # Kui analüüs ebaõnnestus (nt tundmatu lühend), jätame sõna muutmata
+        return sona
+
+    # Võtame esimese (EstNLTK poolt parimaks peetud) analüüsi
+    lemma, sonaliik = analyysid[0] # sonaliik nt S, A, V, Num
+
+    # Määra soovitud tunnused sõnaliigi järgi
+    soovitud_tunnus = None
+
+    if sonaliik in _KAANDSONALIIGID: # Nimisõna, Omadussõna, Arvsõna, Asesõna
+        # Määrame ainsuse partitiivi (sg p)
+        soovitud_tunnus = "sg p" 
+    elif sonaliik == 'V': # Tegusõna
+        # Määrame da-infinitiivi (da)
+        soovitud_tunnus = "da" 
+    
+    # Kui soovitud tunnus on määratud, proovime sünteesida
+    if soovitud_tunnus:
+        # 2. Generatsioon: Moodustame uue vormi algvormist ja tunnustest
+        try:
+            # Synthesize tagastab loendi võimalikest vormidest, võtame esimese
+            genereeritud_vormid = _sunteesi(lemma, soovitud_tunnus)
+
+            if genereeritud_vormid:
+                return genereeritud_vormid[-1]
+            # Kui generatsioon ebaõnnestus, kasutame algvormi
+            return lemma
         except Exception:
-             # Üldine veapüük analüüsi või Text loomise ajal
-             valjund_loend.append(sona)
+            # Jätame sõna muutmata, kui generatsioon viskab vea
+            return sona
 
-    return valjund_loend
+    # Jätame muud sõnad (sidesõnad, määrsõnad jne.) muutmata
+    return sona
+
+
+@lru_cache(maxsize=10_000)
+def _analyysi(tekst: str) -> Analyysid:
+    """
+    Morfoloogiline analüüs: iga sõna kõik (lemma, sõnaliik) paarid.
+    Tag_layer on kallis, seega korduvad sisendid võetakse vahemälust.
+    """
+    text_obj = Text(tekst)
+    text_obj.tag_layer(['morph_analysis'])
+    return tuple(
+        tuple((annotation['lemma'], annotation['partofspeech']) for annotation in sona.annotations)
+        for sona in text_obj['morph_analysis']
+    )
+
+
+@lru_cache(maxsize=10_000)
+def _sunteesi(lemma: str, tunnus: str) -> Tuple[str, ...]:
+    """Vormide süntees algvormist ja tunnustest, vahemällu salvestatuna."""
+    return tuple(synthesize(lemma, tunnus))
 
 
-@staticmethod
 def get_suggestions(word: str):
     if not word or word.isspace():
         return []
     
-    text = Text(word)
-    text.tag_layer(['morph_analysis'])
-    
     suggestions = set()
-    for word_obj in text.words:
-        for annotation in word_obj.morph_analysis.annotations:
-            lemma = annotation.lemma
-            pos = annotation.partofspeech
-            
+    for annotations in _analyysi(word):
+        for lemma, pos in annotations:
             target_form = None
             # Handling Nouns, Adjectives, Numerals, Pronouns
-            if pos in ['S', 'A', 'N', 'Num', 'P']:
+            if pos in _KAANDSONALIIGID:
                 target_form = 'sg p'  # Singular Partitive (osastav)
             elif pos == 'V':
                 target_form = 'da'    # da-infinitive
             
             if target_form:
                 # Use synthesize to generate the word forms from the lemma
-                res = synthesize(lemma, target_form)
+                res = _sunteesi(lemma, target_form)
                 for form in res:
                     suggestions.add(form)
 
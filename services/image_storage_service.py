@@ -1,17 +1,22 @@
 import asyncio
+import hashlib
+import hmac
 import io
 import logging
 import os
 import time
-from typing import Any, Dict, List, Tuple
-import uuid
-from PIL import Image
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from urllib.parse import quote
+from PIL import Image, ImageOps
 import pillow_heif
-import aiofiles
 from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack
 from fastapi import UploadFile
 import aiobotocore
 import aiobotocore.session
+from botocore.config import Config
 from config import settings
 
 # Configuration via environment variables
@@ -26,6 +31,25 @@ logger = logging.getLogger(__name__)
 
 pillow_heif.register_heif_opener()
 
+# Longest edge of stored images, in pixels
+MAX_IMAGE_SIZE = 1600
+
+# Uploads in flight per batch: enough to overlap conversion with network I/O, while
+# leaving worker threads and pooled connections for other requests (seeding sends ~55)
+MAX_CONCURRENT_UPLOADS = 8
+
+# Presigned URL cache: a URL is reused only while it still has this much validity left,
+# so the frontend always gets at least ~50 minutes out of a default one-hour link
+URL_CACHE_MIN_REMAINING = 3000
+URL_CACHE_MAX_ENTRIES = 10_000
+
+# S3 DeleteObjects accepts at most this many keys per request
+DELETE_OBJECTS_MAX_KEYS = 1000
+
+def _new_object_name(extension: str) -> str:
+    """Random 128-bit storage key (32 hex chars); skips building a UUID object just to format it."""
+    return f"{os.urandom(16).hex()}{extension}"
+
 class ImageStorageService(ABC):
     @abstractmethod
     async def upload(self, file: UploadFile, original_filename: str = "") -> str:
@@ -48,69 +72,105 @@ class ImageStorageService(ABC):
     async def delete_batch(self, filenames: List[str]) -> Dict[str, bool]:
         pass
 
+    async def close(self):
+        """Releases long-lived resources (connections); called on app shutdown."""
+        pass
+
+    @staticmethod
+    async def _gather_bounded(coros) -> list:
+        """Like asyncio.gather, but runs at most MAX_CONCURRENT_UPLOADS at a time."""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+        async def _run(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(_run(c) for c in coros))
+
     async def _process_image_to_jpeg(self, file: UploadFile) -> Tuple[bytes, str]:
         """
         Reads UploadFile, converts HEIC/PNG/etc to JPEG, and returns (bytes, new_extension)
         """
         await file.seek(0)
-        original_content = await file.read()
-        
-        # Open the image using Pillow
+        if file.size == 0:
+            raise ValueError("Image file is empty.")
+
+        # Decoding, resizing and encoding are CPU-bound (Pillow releases the GIL for them),
+        # so run them in a worker thread instead of stalling the event loop per upload
+        return await asyncio.to_thread(self._convert_to_jpeg, file.file), ".jpg"
+
+    @staticmethod
+    def _convert_to_jpeg(source: BinaryIO) -> bytes:
+        """Synchronous conversion core of _process_image_to_jpeg."""
+        # Open the image using Pillow straight from the spooled file, so the
+        # upload is never copied into an intermediate bytes object
         # (register_heif_opener allows Image.open to handle HEIC)
-        img = Image.open(io.BytesIO(original_content))
-
-        # TRANSPARENCY HANDLING
-        if img.mode != "RGBA":
-            img = img.convert("RGBA")
+        img = Image.open(source)
 
-        # Create a background canvas 
-        # (Using pure white (255, 255, 255) to match the card background)
-        background = Image.new("RGBA", img.size, settings.image_background_color)
-        
-        # Composite the image over the white background
-        # Alpha_composite is cleaner than 'paste' for transparent images
-        img = Image.alpha_composite(background, img)
-        
-        # Drop the Alpha channel now that we have a solid background
-        img = img.convert("RGB")
+        # JPEG sources can be decoded at a reduced scale (1/2 .. 1/8) that still covers
+        # the final size, so large phone photos never materialize at full resolution
+        scale = MAX_IMAGE_SIZE / max(img.size)
+        if scale < 1:
+            img.draft("RGB", (round(img.width * scale), round(img.height * scale)))
 
-        # Fix EXIF orientation
+        # Fix EXIF orientation (before any conversion, which would drop the EXIF data)
         try:
-            from PIL import ImageOps
             img = ImageOps.exif_transpose(img)
         except Exception:
             pass # If no EXIF data, just continue
 
-        max_size = 1600 
-        if max(img.size) > max_size:
-            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        # TRANSPARENCY HANDLING
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        if has_alpha:
+            if img.mode != "RGBA":
+                img = img.convert("RGBA")
+
+            # Create a background canvas 
+            # (Using pure white (255, 255, 255) to match the card background)
+            background = Image.new("RGBA", img.size, settings.image_background_color)
+            
+            # Composite the image over the white background
+            # Alpha_composite is cleaner than 'paste' for transparent images
+            img = Image.alpha_composite(background, img)
+        
+        # Drop the Alpha channel now that we have a solid background
+        # (opaque images go straight to RGB; compositing them would be a no-op)
+        img = img.convert("RGB")
+
+        if max(img.size) > MAX_IMAGE_SIZE:
+            img.thumbnail((MAX_IMAGE_SIZE, MAX_IMAGE_SIZE), Image.Resampling.LANCZOS)
         
         # Compress and save as JPEG
         output = io.BytesIO()
         img.save(output, format="JPEG", quality=60, optimize=True)
-        jpeg_bytes = output.getvalue()
-        
-        return jpeg_bytes, ".jpg"
+        return output.getvalue()
+
+def _write_file(path: str, content: bytes) -> None:
+    """
+    Writes an encoded image in one go. A single write() of the whole payload bypasses the
+    userspace buffer, and open/write/close share one thread hop instead of three.
+    """
+    with open(path, "wb") as out_file:
+        out_file.write(content)
 
 class LocalStorageService(ImageStorageService):
     """Saves to a local directory - Best for development"""
     def __init__(self, upload_dir: str = "uploads"):
         self.upload_dir = upload_dir
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir)
+        # Runs once per worker (the service is cached), so a blocking call is fine here
+        os.makedirs(upload_dir, exist_ok=True)
 
     async def upload_batch(self, files: List[Tuple[Any, Any, UploadFile]]) -> List[Tuple[Any, Any, str]]:
         """Batch upload for local storage."""
         async def _upload_one(tag, meta, file: UploadFile):            
             content, extension = await self._process_image_to_jpeg(file)
-            unique_name = f"{uuid.uuid4()}{extension}"
+            unique_name = _new_object_name(extension)
             filepath = os.path.join(self.upload_dir, unique_name)
-            async with aiofiles.open(filepath, 'wb') as out_file:
-                await out_file.write(content)
+            await asyncio.to_thread(_write_file, filepath, content)
             return tag, meta, unique_name
 
         tasks = [_upload_one(t, m, f) for t, m, f in files]
-        return await asyncio.gather(*tasks)
+        return await self._gather_bounded(tasks)
 
     async def upload(self, file: UploadFile, original_filename: str = "") -> str:
         source_name = original_filename or file.filename
@@ -118,27 +178,25 @@ class LocalStorageService(ImageStorageService):
             raise ValueError("Not a valid filename: No filename provided or found on object.")
 
         content, extension = await self._process_image_to_jpeg(file)
-        filename = f"{uuid.uuid4()}{extension}"
+        filename = _new_object_name(extension)
         filepath = os.path.join(self.upload_dir, filename)
-        async with aiofiles.open(filepath, 'wb') as out_file:
-            await out_file.write(content)
+        await asyncio.to_thread(_write_file, filepath, content)
         return filename
     
     async def delete_batch(self, filenames: List[str]) -> Dict[str, bool]:
-        """Batch delete for local storage."""
-        results = {}
-        for fname in filenames:
-            safe_name = os.path.basename(fname)
-            path = os.path.join(self.upload_dir, safe_name)
-            try:
-                if os.path.exists(path):
+        """Batch delete for local storage (all removals in one worker thread)."""
+        def _delete_all() -> Dict[str, bool]:
+            results = {}
+            for fname in filenames:
+                path = os.path.join(self.upload_dir, os.path.basename(fname))
+                try:
                     os.remove(path)
                     results[fname] = True
-                else:
+                except OSError:
                     results[fname] = False
-            except Exception:
-                results[fname] = False
-        return results
+            return results
+
+        return await asyncio.to_thread(_delete_all)
     
     async def delete(self, filename: str) -> bool:
         """
@@ -149,10 +207,11 @@ class LocalStorageService(ImageStorageService):
         safe_filename = os.path.basename(filename)
         filepath = os.path.join(self.upload_dir, safe_filename)
 
+        # One syscall in a worker thread; a missing file surfaces as FileNotFoundError
         try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                return True
+            await asyncio.to_thread(os.remove, filepath)
+            return True
+        except FileNotFoundError:
             return False
         except Exception as e:
             print(f"Error deleting file {filepath}: {e}")
@@ -168,88 +227,122 @@ class CloudflareR2Service(ImageStorageService):
     """
     
     def __init__(self):
-        self.endpoint_url = f"https://{R2_ACCOUNT_ID}.r2.cloudflarestorage.com"
+        self.host = f"{R2_ACCOUNT_ID}.r2.cloudflarestorage.com"
+        self.endpoint_url = f"https://{self.host}"
+        # SigV4 signing key, derived once per UTC day: (datestamp, key)
+        self._signing_key: Optional[Tuple[str, bytes]] = None
         # Create a single session instance for the service
         self.session = aiobotocore.session.get_session()
-        self._url_cache = {} # In-memory cache: { "path": (url, expiry_timestamp) }
-
-    async def upload_batch(self, items: List[Tuple[Any, Any, UploadFile]]) -> List[Tuple[Any, Any, str]]:
+        # LRU of presigned URLs: { (filename, expires_in): (url, reuse_until) }
+        self._url_cache: "OrderedDict[Tuple[str, int], Tuple[str, float]]" = OrderedDict()
+        # botocore keeps only 10 pooled connections by default; batch uploads and URL
+        # fan-outs run well past that, so raise the ceiling and keep sockets alive
+        self._botocore_config = Config(
+            max_pool_connections=64,
+            retries={'max_attempts': 3, 'mode': 'standard'},
+            tcp_keepalive=True,
+            connect_timeout=2,
+            read_timeout=10,
+        )
+        # One S3 client (and its connection pool) for the worker's lifetime, opened on first use
+        self._client: Any = None
+        self._client_stack = AsyncExitStack()
+        self._client_lock = asyncio.Lock()
+
+    async def _get_client(self) -> Any:
         """
-        Uploads multiple files using a SINGLE client session to avoid handshake overhead.
-        'items' is a list of (type_tag, metadata, upload_file)
+        Returns the shared S3 client, creating it once. Reusing it skips endpoint
+        resolution and credential loading, and keeps TLS connections to R2 warm.
+        Typed as Any so Pylance doesn't assume methods like put_object are NoReturn.
         """
-        uploaded_results = []
-        
-        async with self.session.create_client(
-            's3',
-            endpoint_url=self.endpoint_url,
-            aws_access_key_id=R2_ACCESS_KEY,
-            aws_secret_access_key=R2_SECRET_KEY
-        ) as client:
-            s3_client: Any = client
-
-            async def _single_upload(type_tag, metadata, file: UploadFile):
-                content, extension = await self._process_image_to_jpeg(file)
-                unique_name = f"{uuid.uuid4()}{extension}"
-                
-                await s3_client.put_object(
-                    Bucket=R2_BUCKET_NAME,
-                    Key=unique_name,
-                    Body=content,
-                    ContentType="image/jpeg"
+        if self._client is not None:
+            return self._client
+        async with self._client_lock:
+            if self._client is None:
+                self._client = await self._client_stack.enter_async_context(
+                    self.session.create_client(
+                        's3',
+                        endpoint_url=self.endpoint_url,
+                        aws_access_key_id=R2_ACCESS_KEY,
+                        aws_secret_access_key=R2_SECRET_KEY,
+                        region_name="auto", # R2 requires a region, 'auto' is standard for R2
+                        config=self._botocore_config,
+                    )
                 )
-                return type_tag, metadata, unique_name
+        return self._client
 
-            # Execute all uploads within the SAME client context
-            tasks = [_single_upload(t, m, f) for t, m, f in items]
-            uploaded_results = await asyncio.gather(*tasks)
-            
-        return uploaded_results
+    async def close(self):
+        """Closes the shared client and its connection pool."""
+        async with self._client_lock:
+            self._client = None
+            await self._client_stack.aclose()
 
-    async def upload(self, file: UploadFile, original_filename: str = "") -> str:
+    async def upload_batch(self, items: List[Tuple[Any, Any, UploadFile]]) -> List[Tuple[Any, Any, str]]:
         """
-        Uploads a file to Cloudflare R2.
+        Uploads multiple files concurrently (bounded) over the shared client.
+        'items' is a list of (type_tag, metadata, upload_file)
         """
-        async with self.session.create_client(
-            's3',
-            endpoint_url=self.endpoint_url,
-            aws_access_key_id=R2_ACCESS_KEY,
-            aws_secret_access_key=R2_SECRET_KEY
-        ) as client:
-            # Type hinting the client as Any prevents Pylance from 
-            # incorrectly assuming methods like put_object are NoReturn.
-            s3_client: Any = client
+        s3_client = await self._get_client()
 
+        async def _single_upload(type_tag, metadata, file: UploadFile):
             content, extension = await self._process_image_to_jpeg(file)
-            filename = f"{uuid.uuid4()}{extension}"
+            unique_name = _new_object_name(extension)
             
-            # This will now pass type checking while remaining awaitable at runtime
             await s3_client.put_object(
                 Bucket=R2_BUCKET_NAME,
-                Key=filename,
+                Key=unique_name,
                 Body=content,
                 ContentType="image/jpeg"
             )
+            return type_tag, metadata, unique_name
+
+        tasks = [_single_upload(t, m, f) for t, m, f in items]
+        return await self._gather_bounded(tasks)
+
+    async def upload(self, file: UploadFile, original_filename: str = "") -> str:
+        """
+        Uploads a file to Cloudflare R2.
+        """
+        s3_client = await self._get_client()
+
+        content, extension = await self._process_image_to_jpeg(file)
+        filename = _new_object_name(extension)
+        
+        await s3_client.put_object(
+            Bucket=R2_BUCKET_NAME,
+            Key=filename,
+            Body=content,
+            ContentType="image/jpeg"
+        )
         return filename
     
     async def delete_batch(self, filenames: List[str]) -> Dict[str, bool]:
-        """Bulk delete from R2."""
+        """
+        Bulk delete from R2, up to DELETE_OBJECTS_MAX_KEYS keys per request.
+        Quiet mode makes R2 report only the keys that failed.
+        """
+        s3_client = await self._get_client()
         results = {}
-        async with self.session.create_client(
-            's3', endpoint_url=self.endpoint_url,
-            aws_access_key_id=R2_ACCESS_KEY, aws_secret_access_key=R2_SECRET_KEY
-        ) as client:
-            s3_client: Any = client
-            delete_list = [{'Key': os.path.basename(f)} for f in filenames]
+        for start in range(0, len(filenames), DELETE_OBJECTS_MAX_KEYS):
+            chunk = filenames[start:start + DELETE_OBJECTS_MAX_KEYS]
+            keys = {os.path.basename(f): f for f in chunk}
             try:
-                await s3_client.delete_objects(
+                response = await s3_client.delete_objects(
                     Bucket=R2_BUCKET_NAME,
-                    Delete={'Objects': delete_list}
+                    Delete={'Objects': [{'Key': k} for k in keys], 'Quiet': True}
                 )
-                return {f: True for f in filenames}
             except Exception as e:
                 logger.error(f"Bulk delete failed: {e}")
-                return {f: False for f in filenames}
+                results.update({f: False for f in chunk})
+                continue
+
+            failed = {keys[err['Key']] for err in response.get('Errors', []) if err.get('Key') in keys}
+            for err in response.get('Errors', []):
+                logger.error(f"Failed to delete {err.get('Key')} from R2: {err.get('Message')}")
+            results.update({f: f not in failed for f in chunk})
+
+        self._forget_urls([f for f, ok in results.items() if ok])
+        return results
 
     async def delete(self, filename: str) -> bool:
         """
@@ -261,55 +354,90 @@ class CloudflareR2Service(ImageStorageService):
         safe_key = os.path.basename(filename)
 
         try:
-            async with self.session.create_client(
-                's3',
-                endpoint_url=self.endpoint_url,
-                aws_access_key_id=R2_ACCESS_KEY,
-                aws_secret_access_key=R2_SECRET_KEY
-            ) as client:
-                # Type hinting the client as Any prevents Pylance from 
-                # incorrectly assuming methods like delete_object are NoReturn.
-                s3_client: Any = client
-
-                await s3_client.delete_object(
-                    Bucket=R2_BUCKET_NAME, 
-                    Key=safe_key
-                )
-                return True
+            s3_client = await self._get_client()
+            await s3_client.delete_object(
+                Bucket=R2_BUCKET_NAME, 
+                Key=safe_key
+            )
+            self._forget_urls([filename])
+            return True
         except Exception as e:
             print(f"Error deleting {safe_key} from R2: {e}")
             return False
         
     async def get_url(self, filename: str, expires_in: int = 3600) -> str:
         """Generates a Presigned URL for direct download from R2"""
-        if filename in self._url_cache:
-            url, expiry = self._url_cache[filename]
-            if expiry > time.time() + 3000:
+        key = (filename, expires_in)
+        cached = self._url_cache.get(key)
+        if cached is not None:
+            url, reuse_until = cached
+            if reuse_until > time.time():
+                self._url_cache.move_to_end(key)
                 return url
+            del self._url_cache[key]
 
+        url = self._presign_get(filename, expires_in)
 
-        async with self.session.create_client(
-            's3',
-            endpoint_url=self.endpoint_url,
-            aws_access_key_id=R2_ACCESS_KEY,
-            aws_secret_access_key=R2_SECRET_KEY,
-            region_name="auto" # R2 requires a region, 'auto' is standard for R2
-        ) as client:
-            s3_client: Any = client
-
-            url = await s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': R2_BUCKET_NAME, 'Key': filename},
-                ExpiresIn=expires_in
-            )
-
-            self._url_cache[filename] = (url, time.time() + expires_in)
-            return url
-
+        reuse_until = time.time() + expires_in - URL_CACHE_MIN_REMAINING
+        if reuse_until > time.time():
+            self._url_cache[key] = (url, reuse_until)
+            if len(self._url_cache) > URL_CACHE_MAX_ENTRIES:
+                self._url_cache.popitem(last=False)
+        return url
 
+    def _presign_get(self, filename: str, expires_in: int) -> str:
+        """
+        SigV4 query-string presign of a path-style GET, computed locally. Produces the same
+        URL as the client's generate_presigned_url, minus its per-call signer and
+        request-model setup: one SHA-256 and one HMAC once the day's key exists.
+        """
+        now = time.gmtime()
+        amz_date = time.strftime("%Y%m%dT%H%M%SZ", now)
+        datestamp = amz_date[:8]
+        scope = f"{datestamp}/auto/s3/aws4_request"
+
+        path = quote(f"/{R2_BUCKET_NAME}/{filename}", safe="/~")
+        query = (
+            "X-Amz-Algorithm=AWS4-HMAC-SHA256"
+            f"&X-Amz-Credential={quote(f'{R2_ACCESS_KEY}/{scope}', safe='-_.~')}"
+            f"&X-Amz-Date={amz_date}"
+            f"&X-Amz-Expires={expires_in}"
+            "&X-Amz-SignedHeaders=host"
+        )
+        canonical_request = f"GET\n{path}\n{query}\nhost:{self.host}\n\nhost\nUNSIGNED-PAYLOAD"
+        string_to_sign = (
+            f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n"
+            f"{hashlib.sha256(canonical_request.encode()).hexdigest()}"
+        )
+        signature = hmac.new(self._get_signing_key(datestamp), string_to_sign.encode(), hashlib.sha256).hexdigest()
+        return f"{self.endpoint_url}{path}?{query}&X-Amz-Signature={signature}"
+
+    def _get_signing_key(self, datestamp: str) -> bytes:
+        """Derives (and caches for the day) the SigV4 key for region 'auto', service 's3'."""
+        if self._signing_key is None or self._signing_key[0] != datestamp:
+            key = f"AWS4{R2_SECRET_KEY}".encode()
+            for part in (datestamp, "auto", "s3", "aws4_request"):
+                key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+            self._signing_key = (datestamp, key)
+        return self._signing_key[1]
+
+    def _forget_urls(self, filenames: List[str]):
+        """Drops cached URLs of deleted objects so they are never handed out again."""
+        gone = set(filenames)
+        for key in [k for k in self._url_cache if k[0] in gone]:
+            del self._url_cache[key]
+
+
+@lru_cache(maxsize=1)
 def get_storage_service() -> ImageStorageService:
-    """Factory to switch between local and prod"""
+    """Factory to switch between local and prod (one shared instance per worker)"""
     logger.debug(f"Storage Type detected as {STORAGE_TYPE}")
     if STORAGE_TYPE == "CLOUDFLARE":
         return CloudflareR2Service()
-    return LocalStorageService()
\ No newline at end of file
+    return LocalStorageService()
+
+
+async def close_storage_service():
+    """Closes the shared storage service, if one was created. Registered on the app lifespan."""
+    if get_storage_service.cache_info().currsize:
+        await get_storage_service().close()
@@ -1,7 +1,8 @@
 import asyncio
 import logging
 from typing import List, Optional, Tuple
-from fastapi import Depends, UploadFile, HTTPException, status
+from fastapi import BackgroundTasks, Depends, UploadFile, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy.exc import NoResultFound
 from uuid import UUID as PyUUID
 
@@ -11,6 +12,9 @@ from services.image_storage_service import ImageStorageService, get_storage_serv
 
 logger = logging.getLogger(__name__)
 
+# Validates a whole result set in one call into pydantic-core instead of one call per row
+_IMAGE_WORD_LIST = TypeAdapter(List[ImageWord])
+
 class ImageWordService:
     """
     Service class for managing ImageWord entities.
@@ -31,7 +35,7 @@ class ImageWordService:
         """
         try:
             word_dicts = await self.repo.get_image_words_by_category(user_id, category_id)
-            return [ImageWord.model_validate(wd) for wd in word_dicts]
+            return _IMAGE_WORD_LIST.validate_python(word_dicts)
         except Exception as e:
             logger.error(f"Error fetching words for category {category_id}: {e}")
             raise HTTPException(
@@ -50,7 +54,7 @@ class ImageWordService:
                 detail=f"ImageWord not found with ID: {id}"
             )
         
-        return ImageWord.model_validate(word_data)
+        return ImageWord.from_orm_trusted(word_data)
     
     async def save_batch(
         self, 
@@ -69,10 +73,11 @@ class ImageWordService:
             uploaded_urls = await asyncio.gather(*upload_tasks)
 
             # 2. Prepare Database Objects
+            # Fields were validated at the HTTP boundary, so skip re-validating them here
             word_data_list = []
             for i, (category_id, word_text, osastav_text, _) in enumerate(items):
                 word_data_list.append(
-                    ImageWordCreate(
+                    ImageWordCreate.model_construct(
                         category_id=category_id,
                         word=word_text,
                         word_osastav=osastav_text,
@@ -85,13 +90,16 @@ class ImageWordService:
 
             await self.repo.session.commit()
             
-            return [ImageWord.model_validate(r) for r in saved_records]
+            return _IMAGE_WORD_LIST.validate_python(saved_records)
 
         except Exception as e:
             # Cleanup: Delete ALL successfully uploaded images from Cloudflare on any failure
-            if uploaded_urls:
-                cleanup_tasks = [self.storage_service.delete(url) for url in uploaded_urls if url]
-                await asyncio.gather(*cleanup_tasks, return_exceptions=True)
+            urls_to_clean = [url for url in uploaded_urls if url]
+            if urls_to_clean:
+                try:
+                    await self.storage_service.delete_batch(urls_to_clean)
+                except Exception as cleanup_error:
+                    logger.warning(f"Orphaned images left after failed create: {cleanup_error}")
             
             await self.repo.session.rollback()
             logger.error(f"Batch seeding failed: {e}")
@@ -140,8 +148,8 @@ class ImageWordService:
             if has_new_image:
                 new_image_url = await self.storage_service.upload(image_file) # type: ignore
 
-            # 3. Save to DB
-            update_data = ImageWordCreate(            
+            # 3. Save to DB (inputs were validated at the HTTP boundary)
+            update_data = ImageWordCreate.model_construct(
                 category_id=category_id,
                 word=word_text,
                 word_osastav=osastav_text,
@@ -153,9 +161,9 @@ class ImageWordService:
             
             # 4. Cleanup old image only after successful commit
             if has_new_image and old_image_url:
-                await self.storage_service.delete(str(old_image_url))
+                await self.storage_service.delete(old_image_url)
                 
-            return ImageWord.model_validate(updated_data)
+            return ImageWord.from_orm_trusted(updated_data)
 
         except Exception as e:
             # Cleanup orphaned new upload
@@ -172,17 +180,22 @@ class ImageWordService:
                 detail="Failed to update image word."
             )
 
-    async def delete_by_id(self, user_id: PyUUID, id: int):
+    async def delete_by_id(self, user_id: PyUUID, id: int, background_tasks: BackgroundTasks):
         """
-        Deletes the DB record first, then cleans up storage.
+        Deletes the DB record first, then cleans up storage after the response.
         """
-        # 1. Authorize (find_by_id handles the logic)
-        image_word = await self.find_by_id(user_id, id)
-
         try:
-            # 2. Delete the record
-            await self.repo.delete_image_word_by_id(user_id, id)
+            # 1. Authorize, delete and fetch the image URL in one statement
+            deleted, image_url = await self.repo.delete_image_word_returning_url(user_id, id)
+            if not deleted:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"ImageWord not found with ID: {id}"
+                )
             await self.repo.session.commit()
+        except HTTPException:
+            await self.repo.session.rollback()
+            raise
         except Exception as e:
             await self.repo.session.rollback()
             logger.error(f"Delete failed for word {id}: {e}")
@@ -191,11 +204,14 @@ class ImageWordService:
                 detail="Database deletion failed."
             )
         
-        # 3. Storage Cleanup (Post-Commit)
-        if image_word.image_url:
-            try:
-                await self.storage_service.delete(str(image_word.image_url))
-            except Exception as e:
-                # Log but don't fail the request since the DB is already updated
-                # TODO In a pro system, you'd log this for a background cleanup task.
-                logger.warning(f"Failed to cleanup image {image_word.image_url} for word {id}: {e}")
\ No newline at end of file
+        # 2. Storage Cleanup (Post-Commit): the DB is consistent, so it runs once the 204 is out
+        if image_url:
+            background_tasks.add_task(self._delete_image, image_url, id)
+
+    async def _delete_image(self, image_url: str, word_id: int):
+        """Background storage cleanup; a failure only leaves an orphaned file behind."""
+        try:
+            await self.storage_service.delete(image_url)
+        except Exception as e:
+            # TODO In a pro system, you'd log this for a background cleanup task.
+            logger.warning(f"Failed to cleanup image {image_url} for word {word_id}: {e}")
\ No newline at end of file
@@ -2,7 +2,7 @@ import asyncio
 import logging
 from typing import List, Optional, Set, Tuple, cast
 from uuid import UUID as PyUUID
-from fastapi import Depends, HTTPException, UploadFile, status
+from fastapi import BackgroundTasks, Depends, HTTPException, UploadFile, status
 from sqlalchemy.exc import NoResultFound
 
 from db.category_repository import CategoryRepository
@@ -83,55 +83,47 @@ class ProfileService:
                 detail="Failed to initialize profile data."
             )
 
-    async def delete_by_id(self, id: int, user_id: PyUUID):
+    async def delete_by_id(self, id: int, user_id: PyUUID, background_tasks: BackgroundTasks):
         """
-        Deletes a profile and all associated images in storage.
+        Deletes a profile, then all associated images in storage after the response.
         """
-        # Fetch full graph for cleanup (ensure categories and items are loaded)
-        profile = await self.find_by_id(id, user_id)
-        if not profile:
-            raise HTTPException(status_code=404, detail="Profile not found")
-            
-        urls_to_delete: Set[str] = set()
-        
-        # Collect all asset URLs from categories and their words
-        if profile.categories:
-            for category in profile.categories:
-                if category.image_url:
-                    urls_to_delete.add(category.image_url)
-                
-                items = getattr(category, 'items', [])
-                for item in items:
-                    if item.image_url:
-                        urls_to_delete.add(item.image_url)
-
         try:
-            # Database deletion (cascading delete should handle child rows in DB)
-            await self.repo.delete(user_id, id)
+            # One statement deletes the profile (children cascade in the DB) and
+            # returns the asset URLs of its categories and words
+            deleted_urls = await self.repo.delete_returning_image_urls(user_id, id)
+            if deleted_urls is None:
+                raise HTTPException(status_code=404, detail="Profile not found")
+            await self.repo.clear_profile_flag_if_none_left(user_id)
             await self.repo.session.commit()
+        except HTTPException:
+            await self.repo.session.rollback()
+            raise
         except Exception as e:
             await self.repo.session.rollback()
             logger.error(f"Profile deletion failed: {e}")
             raise HTTPException(status_code=500, detail="Database deletion failed.")
 
-        # Storage cleanup (Post-Commit)
+        # Storage cleanup (Post-Commit): the DB is consistent, so it runs once the 204 is out
+        urls_to_delete: Set[str] = set(deleted_urls)
         if urls_to_delete:
-            try:
-                await self.image_storage_service.delete_batch(list(urls_to_delete))
-            except Exception as e:
-                # TODO In a pro system, you'd log this for a background cleanup task.
-                logger.warning(f"Orphaned image left: {e}")
+            background_tasks.add_task(self._delete_images, list(urls_to_delete))
+
+    async def _delete_images(self, urls: List[str]):
+        """Background storage cleanup; failures only leave orphaned files behind."""
+        try:
+            results = await self.image_storage_service.delete_batch(urls)
+        except Exception as e:
+            # TODO In a pro system, you'd log this for a background cleanup task.
+            logger.warning(f"Orphaned images left: {e}")
+            return
+        failed = [url for url, ok in results.items() if not ok]
+        if failed:
+            logger.warning(f"Storage cleanup incomplete for: {failed}")
 
     async def seed_categories_and_image_words(self, user_id: PyUUID, profile_id: int):
         """
         Internal helper to populate a new profile with defaults.
-        Imports services locally to avoid circular dependency issues.
         """
-        from service_dependencies import get_category_service, get_image_word_service
-        
-        category_service = get_category_service(self.cat_repo, self.image_storage_service)
-        image_word_service = get_image_word_service(self.i_w_repo, self.image_storage_service)
-
         # Structure: (Category Name, Asset Filename)
         categories_to_seed = [
             ("Algused", "beginning.png"),
@@ -207,7 +199,7 @@ class ProfileService:
         
         for tag, meta, url in uploaded_data:
             if tag == "cat":
-                cat_dtos.append(CategoryCreate(name=meta, image_url=url, profile_id=profile_id))
+                cat_dtos.append(CategoryCreate.model_construct(name=meta, image_url=url, profile_id=profile_id))
             else:
                 c_name, w_text, osastav_text = meta
                 word_map.setdefault(c_name, []).append((w_text, osastav_text, url))
@@ -228,7 +220,7 @@ class ProfileService:
                     continue
 
                 for w_text, osastav_text, url in items:
-                    final_word_dtos.append(ImageWordCreate(category_id=cid, word=w_text, word_osastav=osastav_text, image_url=url))
+                    final_word_dtos.append(ImageWordCreate.model_construct(category_id=cid, word=w_text, word_osastav=osastav_text, image_url=url))
             
             await self.i_w_repo.save_many(user_id, final_word_dtos)
             
@@ -1,36 +1,59 @@
 import io
 import os
-import mimetypes
 import logging
+from typing import Dict, Tuple
 from fastapi import UploadFile
 from starlette.datastructures import Headers
 
 logger = logging.getLogger(__name__)
 
+# Seed assets are a known, small set of image types, so a suffix lookup replaces mimetypes
+_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+}
+
 class SeedingService:
     def __init__(self):
         self.assets_path = os.path.join(os.getcwd(), "assets", "seed_images")
+        # filename -> (content, content_type); the assets never change while the app runs
+        self._cache: Dict[str, Tuple[bytes, str]] = self._load_assets()
+
+    def _load_assets(self) -> Dict[str, Tuple[bytes, str]]:
+        cache = {}
+        try:
+            entries = list(os.scandir(self.assets_path))
+        except FileNotFoundError:
+            logger.warning(f"Seed image folder not found at {self.assets_path}.")
+            return cache
+
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            with open(entry.path, "rb") as f:
+                content = f.read()
+            content_type = _MIME_TYPES.get(os.path.splitext(entry.name)[1].lower(), "application/octet-stream")
+            cache[entry.name] = (content, content_type)
+        return cache
 
     def get_upload_file(self, filename: str) -> UploadFile:
         """
-        Reads a file from the assets/seed_images folder and returns an UploadFile object.
+        Returns an UploadFile for a file in the assets/seed_images folder, served from memory.
         """
-        file_path = os.path.join(self.assets_path, filename)
-        
         try:
-            with open(file_path, "rb") as f:
-                content = f.read()
-            
-            content_type, _ = mimetypes.guess_type(file_path)
-            if not content_type:
-                content_type = "application/octet-stream"
-
-            return UploadFile(
-                filename=filename,
-                file=io.BytesIO(content),
-                size=len(content),
-                headers=Headers({"content-type": content_type})
-            )
-        except FileNotFoundError:
+            content, content_type = self._cache[filename]
+        except KeyError:
+            file_path = os.path.join(self.assets_path, filename)
             logger.warning(f"Seed image not found at {file_path}.")
-            raise
\ No newline at end of file
+            raise FileNotFoundError(file_path) from None
+
+        # Each call gets its own handle; the backing bytes are immutable and shared
+        return UploadFile(
+            filename=filename,
+            file=io.BytesIO(content),
+            size=len(content),
+            headers=Headers({"content-type": content_type})
+        )
@@ -1,21 +1,118 @@
 import asyncio
 import random
 import logging
-from typing import Dict, Any
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Optional, Tuple
 
 import httpx
+import orjson
 from fastapi import HTTPException, status
 
+from config import settings
+
 API_URL = "https://api.tartunlp.ai/text-to-speech/v2"
 MAX_RETRIES = 5
 BASE_DELAY_MS = 500
+CAP_DELAY_S = 20.0
+STREAM_CHUNK_SIZE = 64 * 1024
+# Error bodies are only quoted in logs and the 400 detail, so only a prefix is downloaded
+ERROR_BODY_MAX_BYTES = 512
+_HTML_TAG = re.compile(r"<[^>]*>")
+# Set once as the shared client's default headers, so no call rebuilds them
+DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "audio/wav"
+}
+
+# Synthesized audio is deterministic per (text, speaker, speed); repeats (UI labels,
+# seeded words) are served from memory. Bounded by total bytes since WAVs vary in size.
+AUDIO_CACHE_TTL_S = 3600
+AUDIO_CACHE_MAX_BYTES = 64 * 1024 * 1024
+AUDIO_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024
 
 logger = logging.getLogger(__name__)
 
+AudioKey = Tuple[str, str, float]
+
+class _AudioCache:
+    """Per-worker LRU of WAV bytes with a TTL and a total-size budget."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[AudioKey, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: AudioKey) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        wav, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return wav
+
+    def put(self, key: AudioKey, wav: bytes):
+        if len(wav) > AUDIO_CACHE_MAX_ENTRY_BYTES:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (wav, time.monotonic() + AUDIO_CACHE_TTL_S)
+        self._size += len(wav)
+        while self._size > AUDIO_CACHE_MAX_BYTES:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: AudioKey):
+        wav, _ = self._entries.pop(key)
+        self._size -= len(wav)
+
+_audio_cache = _AudioCache()
+
+# Caps concurrent upstream requests so a spike queues here instead of tripping the
+# API's rate limit for everyone at once (and retrying in a synchronized storm)
+_upstream_slots = asyncio.Semaphore(settings.tts_max_concurrency)
+
+# Upstream calls in flight per key; concurrent identical requests await the same task
+_inflight: Dict[AudioKey, "asyncio.Task[bytes]"] = {}
+
+def _forget_inflight(key: AudioKey, task: "asyncio.Task[bytes]"):
+    _inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception() # Mark retrieved even if every awaiter went away
+
+def _backoff_delay(prev_delay_s: float, response: Optional[httpx.Response] = None) -> float:
+    """
+    Decorrelated jitter: random(BASE_DELAY, 3 * previous delay), capped at CAP_DELAY_S, so
+    clients throttled together don't retry in lockstep. A 429's numeric Retry-After
+    raises the wait to the server's declared window (still capped).
+    """
+    delay_s = min(CAP_DELAY_S, random.uniform(BASE_DELAY_MS / 1000.0, prev_delay_s * 3))
+    if response is not None and response.status_code == 429:
+        try:
+            delay_s = max(delay_s, min(CAP_DELAY_S, float(response.headers.get("retry-after", 0))))
+        except ValueError:
+            pass # HTTP-date form; keep the jittered delay
+    return delay_s
+
+def _is_retryable(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+async def _read_error_detail(response: httpx.Response) -> str:
+    """First ERROR_BODY_MAX_BYTES of a streamed error body as text, with any HTML tags stripped."""
+    prefix = b""
+    async for chunk in response.aiter_bytes(ERROR_BODY_MAX_BYTES):
+        prefix += chunk
+        if len(prefix) >= ERROR_BODY_MAX_BYTES:
+            break
+    text = prefix[:ERROR_BODY_MAX_BYTES].decode("utf-8", errors="replace")
+    return " ".join(_HTML_TAG.sub(" ", text).split())
+
 class TtsService:
     """
     Service class responsible for communicating with the TartuNLP Text-to-Speech API,
-    handling asynchronous requests and exponential backoff for resilience.
+    handling asynchronous requests and jittered backoff for resilience.
     """
 
     def __init__(self, http_client: httpx.AsyncClient):
@@ -23,89 +120,190 @@ class TtsService:
         self.http_client = http_client
         logger.info("TtsService initialized.")
 
-    async def _make_request(self, payload: Dict[str, Any], attempt: int) -> bytes:
-        """Helper to execute the asynchronous API call with retry logic."""
-        
-        # Calculate delay with jitter: BASE_DELAY * 2^attempt + random(0 to BASE_DELAY)
-        delay_s = (BASE_DELAY_MS / 1000.0) * (2 ** attempt) + random.uniform(0, BASE_DELAY_MS / 1000.0)
+    async def text_to_speech(self, text: str, speaker: str, speed: float) -> bytes:
+        """
+        Main method: serves repeats from the cache and coalesces concurrent identical
+        requests into one upstream call (see _synthesize for the retry handling).
+        """
+        cache_key = (text, speaker, speed)
+        cached = _audio_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+        task = _inflight.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._synthesize(cache_key))
+            _inflight[cache_key] = task
+            task.add_done_callback(lambda done: _forget_inflight(cache_key, done))
+        # Shielded: one caller disconnecting must not cancel the call the others wait on
         try:
-            # Execute the request
-            response = await self.http_client.post(
-                API_URL,
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "audio/wav"
-                }
-            )
-            
-            # Handle success (2xx)
-            if 200 <= response.status_code < 300:
-                return response.content
-            
-            status_code = response.status_code
-            
-            # Handle retryable errors (429, 5xx)
-            if status_code == 429 or status_code >= 500:
-                if attempt < MAX_RETRIES - 1:
-                    logger.warning(
-                        f"Retryable error (Status {status_code}) on attempt {attempt + 1}. "
-                        f"Waiting {delay_s:.2f}s..."
+            return await asyncio.shield(task)
+        except HTTPException as e:
+            # The task holds one exception for every waiter; each caller raises its own copy
+            raise HTTPException(e.status_code, e.detail, e.headers) from None
+
+    async def _synthesize(self, cache_key: AudioKey) -> bytes:
+        """Sends the request, retrying with backoff, and caches the audio on success."""
+        text, speaker, speed = cache_key
+        # Serialized once for all attempts; orjson hands httpx bytes directly
+        body = orjson.dumps({
+            "text": text,
+            "speaker": speaker,
+            "speed": speed
+        })
+        
+        log_text = text[:30] + "..." if len(text) > 30 else text
+        logger.info(f"Requesting TTS for text: '{log_text}' with speaker: {speaker}")
+
+        delay_s = BASE_DELAY_MS / 1000.0
+        for attempt in range(MAX_RETRIES):
+            last_attempt = attempt == MAX_RETRIES - 1
+
+            try:
+                async with _upstream_slots, self.http_client.stream(
+                    "POST",
+                    API_URL,
+                    content=body
+                ) as response:
+                    # Audio is read in full; an error body only as far as the detail needs
+                    if 200 <= response.status_code < 300:
+                        await response.aread()
+                    elif not _is_retryable(response.status_code):
+                        error_detail = await _read_error_detail(response)
+            except (httpx.RequestError, asyncio.TimeoutError) as e:
+                # Handle network/timeout errors
+                if last_attempt:
+                    logger.error(f"Network failed after {MAX_RETRIES} attempts. Last error: {e}")
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail="Failed to connect to the external TTS service."
                     )
-                    await asyncio.sleep(delay_s)
-                    # Use a generic exception to trigger the retry loop in the calling method
-                    raise httpx.RequestError(f"Status {status_code}", request=response.request) 
-                else:
+                delay_s = _backoff_delay(delay_s)
+                logger.error(f"Network error on attempt {attempt + 1}: {e.__class__.__name__}. Waiting {delay_s:.2f}s...")
+            else:
+                status_code = response.status_code
+
+                # Handle success (2xx)
+                if 200 <= status_code < 300:
+                    _audio_cache.put(cache_key, response.content)
+                    return response.content
+
+                # Handle non-retryable client errors (4xx other than 429)
+                if not _is_retryable(status_code):
+                    logger.error(f"Non-retryable API Client Error: Status {status_code}. Body: {error_detail[:100]}...")
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"External TTS API error (Status {status_code}): {error_detail[:50]}"
+                    )
+
+                # Handle retryable errors (429, 5xx)
+                if last_attempt:
                     logger.error(f"Server failed after {MAX_RETRIES} attempts. Last Status: {status_code}")
                     raise HTTPException(
                         status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                         detail="External TTS service failed after maximum retries."
                     )
-            
-            # Handle non-retryable client errors (4xx other than 429)
-            error_detail = response.text
-            logger.error(f"Non-retryable API Client Error: Status {status_code}. Body: {error_detail[:100]}...")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"External TTS API error (Status {status_code}): {error_detail[:50]}"
-            )
-
-        except (httpx.RequestError, asyncio.TimeoutError) as e:
-            # Handle network/timeout errors
-            if attempt < MAX_RETRIES - 1:
-                logger.error(f"Network error on attempt {attempt + 1}: {e.__class__.__name__}. Waiting {delay_s:.2f}s...")
-                await asyncio.sleep(delay_s)
-                raise # Re-raise to trigger the retry loop
-            else:
-                logger.error(f"Network failed after {MAX_RETRIES} attempts. Last error: {e}")
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="Failed to connect to the external TTS service."
+                delay_s = _backoff_delay(delay_s, response)
+                logger.warning(
+                    f"Retryable error (Status {status_code}) on attempt {attempt + 1}. "
+                    f"Waiting {delay_s:.2f}s..."
                 )
 
-    async def text_to_speech(self, text: str, speaker: str, speed: float) -> bytes:
+            await asyncio.sleep(delay_s)
+
+        # Fallback error if the loop finishes without success
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unknown failure during TTS generation after maximum retries."
+        )
+
+    async def text_to_speech_stream(self, text: str, speaker: str, speed: float) -> AsyncIterator[bytes]:
         """
-        Main method to send the request and handle retries.
+        Streams the WAV audio in chunks as it arrives from the API, without buffering it.
+        Retries happen only before the first chunk is yielded.
         """
-        payload = {
+        cache_key = (text, speaker, speed)
+        cached = _audio_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        # Serialized once for all attempts; orjson hands httpx bytes directly
+        body = orjson.dumps({
             "text": text,
             "speaker": speaker,
             "speed": speed
-        }
-        
+        })
+
         log_text = text[:30] + "..." if len(text) > 30 else text
-        logger.info(f"Requesting TTS for text: '{log_text}' with speaker: {speaker}")
+        logger.info(f"Streaming TTS for text: '{log_text}' with speaker: {speaker}")
+        request = self.http_client.build_request("POST", API_URL, content=body)
 
+        delay_s = BASE_DELAY_MS / 1000.0
+        # Once any audio has gone out, a retry would restart the WAV inside the same response
+        started = False
         for attempt in range(MAX_RETRIES):
+            last_attempt = attempt == MAX_RETRIES - 1
+
             try:
-                audio_bytes = await self._make_request(payload, attempt)
-                return audio_bytes
-            except (httpx.RequestError, asyncio.TimeoutError):
-                continue
-        
-        # Fallback error if the loop finishes without success
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Unknown failure during TTS generation after maximum retries."
-        )
\ No newline at end of file
+                # The slot only covers the wait for the response headers; the body is paced
+                # by the end user's connection, so a slow download must not pin a slot
+                async with _upstream_slots:
+                    response = await self.http_client.send(request, stream=True)
+                try:
+                    status_code = response.status_code
+
+                    if 200 <= status_code < 300:
+                        # Keep a copy for the cache unless the audio outgrows a cache entry
+                        chunks: Optional[list] = []
+                        size = 0
+                        async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                            started = True
+                            yield chunk
+                            if chunks is not None:
+                                size += len(chunk)
+                                if size <= AUDIO_CACHE_MAX_ENTRY_BYTES:
+                                    chunks.append(chunk)
+                                else:
+                                    chunks = None
+                        if chunks is not None:
+                            _audio_cache.put(cache_key, b"".join(chunks))
+                        return
+
+                    if _is_retryable(status_code):
+                        if last_attempt:
+                            logger.error(f"Server failed after {MAX_RETRIES} attempts. Last Status: {status_code}")
+                            raise HTTPException(
+                                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="External TTS service failed after maximum retries."
+                            )
+                        delay_s = _backoff_delay(delay_s, response)
+                        logger.warning(
+                            f"Retryable error (Status {status_code}) on attempt {attempt + 1}. "
+                            f"Waiting {delay_s:.2f}s..."
+                        )
+                    else:
+                        error_detail = await _read_error_detail(response)
+                        logger.error(f"Non-retryable API Client Error: Status {status_code}. Body: {error_detail[:100]}...")
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"External TTS API error (Status {status_code}): {error_detail[:50]}"
+                        )
+                finally:
+                    await response.aclose()
+
+            except (httpx.RequestError, asyncio.TimeoutError) as e:
+                if started:
+                    # Headers and part of the body are already sent; abort the response
+                    logger.error(f"Network error mid-stream on attempt {attempt + 1}: {e.__class__.__name__}. Aborting.")
+                    raise
+                if last_attempt:
+                    logger.error(f"Network failed after {MAX_RETRIES} attempts. Last error: {e}")
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail="Failed to connect to the external TTS service."
+                    )
+                delay_s = _backoff_delay(delay_s)
+                logger.error(f"Network error on attempt {attempt + 1}: {e.__class__.__name__}. Waiting {delay_s:.2f}s...")
+
+            await asyncio.sleep(delay_s)
\ No newline at end of file
@@ -1,25 +1,70 @@
+import base64
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 import logging
-import secrets
+import os
+import time
 from uuid import UUID as PyUUID
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import BackgroundTasks, HTTPException, status
-from passlib.context import CryptContext
-from sqlalchemy import select
 
 from db.models import PasswordResetToken
 from db.profile_repository import ProfileRepository
-from db.user_repository import UserRepository
+from db.user_repository import UserRepository, hash_reset_token
 from models.schemas import ResetPasswordUpdate, UserCreate, UserLogin, UserOut, ProfileCreate
 from auth.password_handler import hash_password, verify_password
 from services.email_service import EmailService
 from config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 logger = logging.getLogger(__name__)
 
 DEFAULT_PIN = settings.default_pin
 
+RESET_TOKEN_TTL = timedelta(hours=1)
+RESET_TOKEN_BYTES = 32
+RESET_TOKEN_CACHE_MAX_ENTRIES = 10_000
+RESET_TOKEN_NEGATIVE_TTL_S = 60.0
+
+ResetTokenEntry = Optional[Tuple[PyUUID, datetime]] # (user_id, expires_at); None = no such token
+
+class _ResetTokenCache:
+    """
+    Per-worker LRU of reset-token lookups keyed by token digest. Unknown tokens are
+    remembered briefly so sprayed guesses don't each cost a query; live tokens until they expire.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[ResetTokenEntry, float]]" = OrderedDict()
+
+    def get(self, digest: str) -> Tuple[bool, ResetTokenEntry]:
+        cached = self._entries.get(digest)
+        if cached is None:
+            return False, None
+        entry, deadline = cached
+        if deadline <= time.monotonic():
+            del self._entries[digest]
+            return False, None
+        self._entries.move_to_end(digest)
+        return True, entry
+
+    def put(self, digest: str, entry: ResetTokenEntry):
+        if entry is None:
+            ttl_s = RESET_TOKEN_NEGATIVE_TTL_S
+        else:
+            ttl_s = (entry[1] - datetime.now(timezone.utc)).total_seconds()
+        self._entries.pop(digest, None)
+        if ttl_s <= 0:
+            return # Expired rows stay in the DB until consumed; let the caller see them
+        self._entries[digest] = (entry, time.monotonic() + ttl_s)
+        while len(self._entries) > RESET_TOKEN_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+_reset_token_cache = _ResetTokenCache()
+
+def _new_reset_token() -> str:
+    """URL-safe, unpadded base64 of RESET_TOKEN_BYTES random bytes (same shape as secrets.token_urlsafe)."""
+    return base64.urlsafe_b64encode(os.urandom(RESET_TOKEN_BYTES)).rstrip(b"=").decode("ascii")
+
 class UserService:
     def __init__(self, repository: UserRepository, prof_repo: ProfileRepository, email_service: EmailService, profile_service=None):
         self.repo = repository
@@ -30,19 +75,17 @@ class UserService:
 
     async def register_user(self, user_data: UserCreate) -> UserOut:
         """Registers a new user and seeds their default profile."""
-        existing_user = await self.repo.get_by_email(user_data.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
+        # bcrypt is CPU-bound by design and runs off the event loop; it is the only
+        # work before the insert, which doubles as the duplicate-email check
+        hashed = await hash_password(user_data.password)
 
         try:
-            hashed = hash_password(user_data.password)
             user_model = await self.repo.create(user_data, hashed)
-            
-            # Flush to get user_model.id without committing yet
-            await self.repo.session.flush()
+            if user_model is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
             
             # Seed initial profile immediately
             await self.seed_initial_profile(user_model.id)
@@ -51,6 +94,9 @@ class UserService:
             await self.repo.session.commit()
             return user_model.to_user_out()
             
+        except HTTPException:
+            await self.repo.session.rollback()
+            raise
         except Exception as e:
             await self.repo.session.rollback()
             logger.error(f"Registration failed for {user_data.email}: {e}")
@@ -62,13 +108,15 @@ class UserService:
     async def authenticate_user(self, login_data: UserLogin) -> Optional[UserOut]:
         """Authenticates user and ensures a profile exists (lazy-migration)."""
         user = await self.repo.get_by_email(login_data.email)
-        if not user or not verify_password(login_data.password, str(user.hashed_password)):
+        if not user or not await verify_password(login_data.password, str(user.hashed_password)):
             return None
         
-        # we check this here to ensure every active user has at least one profile
-        await self.seed_initial_profile(user.id)
-        # We commit here because seed_initial_profile might have made changes
-        await self.repo.session.commit()
+        # we check this here to ensure every active user has at least one profile;
+        # once flagged, logins skip the check entirely
+        if not user.has_default_profile:
+            await self.seed_initial_profile(user.id)
+            # We commit here because seed_initial_profile might have made changes
+            await self.repo.session.commit()
         
         return user.to_user_out()
 
@@ -77,10 +125,13 @@ class UserService:
         Checks if a user has profiles; if not, creates a default one.
         If profile_service is available, it triggers deep seeding of categories/words.
         """
-        # Optimized check: we only care if 'any' profile exists
-        existing_profiles = await self.prof_repo.find_all_by_user(user_id)
-        
-        if not existing_profiles:
+        # Only one concurrent caller per user gets past the claim; the rest skip the
+        # seed instead of duplicating it. The flag rolls back with a failed seed.
+        if not await self.repo.claim_default_profile_seed(user_id):
+            return
+
+        # We only care if 'any' profile exists, so skip loading the profile trees
+        if not await self.prof_repo.user_has_any_profile(user_id):
             logger.info(f"User {user_id} has no profiles. Seeding 'Vaikimisi' (Default).")
             
             try:
@@ -109,10 +160,7 @@ class UserService:
 
     async def get_user_pin(self, user_id: PyUUID) -> Optional[str]:
         """Retrieves the PIN for a specific user."""
-        user = await self.repo.get_by_id(user_id)
-        if not user:
-            return None
-        return user.pin
+        return await self.repo.get_pin(user_id)
 
     async def update_user_pin(self, user_id: PyUUID, new_pin: str) -> bool:
         """Updates the user's PIN."""
@@ -128,15 +176,15 @@ class UserService:
 
     async def initiate_pin_reset(self, user_id: PyUUID, background_tasks: BackgroundTasks) -> bool:
         """Logic to send a reset PIN email."""
-        user = await self.repo.get_by_id(user_id)
-        if not user:
+        # The UPDATE doubles as the existence check and hands back the address to mail
+        email = await self.repo.set_pin_returning_email(user_id, DEFAULT_PIN)
+        if email is None:
             return False
         
-        await self.repo.update_user(user_id, {"pin": DEFAULT_PIN})
         await self.repo.session.commit()
             
-        logger.info(f"Initiating PIN reset for {user.email}")
-        background_tasks.add_task(self.email_service.send_pin_reset_email, user.email, DEFAULT_PIN)
+        logger.info(f"Initiating PIN reset for {email}")
+        background_tasks.add_task(self.email_service.send_pin_reset_email, email, DEFAULT_PIN)
         
         return True
     
@@ -150,24 +198,12 @@ class UserService:
         if not user:
             logger.warning(f"Password reset attempted for non-existent email: {email}")
             return True 
-            
-        reset_token = secrets.token_urlsafe(32)
-        
-        expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
         
         try:
-            # 3. Save token to database
-            new_token_entry = PasswordResetToken(
-                token=reset_token,
-                user_id=user.id,
-                expires_at=expires_at
-            )
-            self.repo.session.add(new_token_entry)
-            await self.repo.session.commit()
-            
-            logger.info(f"Stored reset token in DB for user_id: {user.id}")
+            # Only the token insert happens inline; SMTP runs after the response is sent
+            reset_token = await self.create_reset_token(user.id)
 
-            # 4. Add email sending to background tasks
+            # Add email sending to background tasks
             background_tasks.add_task(
                 self.email_service.send_password_reset_email, 
                 email, 
@@ -181,36 +217,73 @@ class UserService:
         
         return True
 
+    async def create_reset_token(self, user_id: PyUUID) -> str:
+        """Generates a secure reset token and commits it to the database."""
+        reset_token = _new_reset_token()
+        expires_at = datetime.now(timezone.utc) + RESET_TOKEN_TTL
+
+        # Only the digest is persisted; the raw token goes out in the email
+        self.repo.session.add(PasswordResetToken(
+            token=hash_reset_token(reset_token),
+            user_id=user_id,
+            expires_at=expires_at
+        ))
+        await self.repo.session.commit()
+        _reset_token_cache.put(hash_reset_token(reset_token), (user_id, expires_at))
+
+        logger.info(f"Stored reset token in DB for user_id: {user_id}")
+        return reset_token
+
+    async def _lookup_reset_token(self, token: str) -> ResetTokenEntry:
+        """(user_id, expires_at) for a stored token, served from the cache when possible."""
+        digest = hash_reset_token(token)
+        hit, entry = _reset_token_cache.get(digest)
+        if hit:
+            return entry
+        record = await self.repo.get_reset_token_record(token)
+        entry = (record.user_id, record.expires_at) if record else None
+        _reset_token_cache.put(digest, entry)
+        return entry
+
     async def complete_password_reset(self, data: ResetPasswordUpdate) -> bool:
         """Coordinates the reset process and handles database commits."""
         # 1. Fetch token record
-        record = await self.repo.get_reset_token_record(data.token)
+        record = await self._lookup_reset_token(data.token)
         
         if not record:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Token on vigane."
             )
+        _, expires_at = record
+        digest = hash_reset_token(data.token)
             
         # 2. Check expiration using timezone-aware UTC objects
-        if datetime.now(timezone.utc) > record.expires_at:
+        if datetime.now(timezone.utc) > expires_at:
             await self.repo.delete_reset_token(data.token)
             await self.repo.session.commit() # Commit deletion of expired token
+            _reset_token_cache.put(digest, None)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Token on vigane."
             )
 
-        # 3. Hash and Update
-        hashed_pw = hash_password(data.new_password)
-        await self.repo.update_user_password(record.user_id, hashed_pw)
-        
-        # 4. Cleanup token
-        await self.repo.delete_reset_token(data.token)
+        # 3. Hash, then consume the token and update the password in one statement.
+        # The DELETE is authoritative, so a token already used (by a concurrent
+        # request or another worker) fails even if it was cached
+        hashed_pw = await hash_password(data.new_password)
+        if not await self.repo.consume_reset_token(data.token, hashed_pw):
+            await self.repo.session.rollback()
+            _reset_token_cache.put(digest, None)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Token on vigane."
+            )
         
-        # 5. Commit all changes at the Service level
+        # 4. Commit all changes at the Service level
         try:
             await self.repo.session.commit()
+            _reset_token_cache.put(digest, None)
             return True
         except Exception as e:
             await self.repo.session.rollback()
@@ -222,9 +295,7 @@ class UserService:
         Validates the existence and expiration of a password reset token.
         """
         # 1. Fetch token from database
-        stmt = select(PasswordResetToken).where(PasswordResetToken.token == token)
-        result = await self.repo.session.execute(stmt)
-        token_entry = result.scalar_one_or_none()
+        token_entry = await self._lookup_reset_token(token)
 
         if not token_entry:
             raise HTTPException(
@@ -234,8 +305,9 @@ class UserService:
 
         # 2. Check expiration
         # Ensure your DB stores timezone-aware datetimes or compare consistently
+        _, expires_at = token_entry
         now = datetime.now(timezone.utc)
-        if token_entry.expires_at.replace(tzinfo=timezone.utc) < now:
+        if expires_at.replace(tzinfo=timezone.utc) < now:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Parooli taastamise link on aegunud."